@@ -0,0 +1,200 @@
+import asyncio
+import json
+import os
+import time
+from collections import OrderedDict
+
+# Admission control settings
+ADMISSION_MAX_CONCURRENCY = int(os.getenv("ADMISSION_MAX_CONCURRENCY", "64"))
+ADMISSION_RESERVED_FOR_BOOKINGS = int(os.getenv("ADMISSION_RESERVED_FOR_BOOKINGS", "16"))
+ADMISSION_LOW_PRIORITY_QUEUE_MS = float(os.getenv("ADMISSION_LOW_PRIORITY_QUEUE_MS", "250"))
+ADMISSION_HIGH_PRIORITY_QUEUE_MS = float(os.getenv("ADMISSION_HIGH_PRIORITY_QUEUE_MS", "5000"))
+ADMISSION_RETRY_AFTER_SECONDS = int(os.getenv("ADMISSION_RETRY_AFTER_SECONDS", "1"))
+RATE_LIMIT_PER_SECOND = float(os.getenv("RATE_LIMIT_PER_SECOND", "20"))
+RATE_LIMIT_BURST = float(os.getenv("RATE_LIMIT_BURST", "40"))
+# Least recently seen clients are evicted beyond this many buckets
+RATE_LIMIT_MAX_CLIENTS = int(os.getenv("RATE_LIMIT_MAX_CLIENTS", "10000"))
+# Proxies whose X-Forwarded-For header uvicorn trusts for the client address.
+# Behind a hosting proxy without fixed addresses (e.g. Render) set "*",
+# otherwise every client shares the proxy's rate limit bucket. The uvicorn
+# CLI reads the same variable.
+PROXY_HEADERS = os.getenv("PROXY_HEADERS", "true").lower() == "true"
+FORWARDED_ALLOW_IPS = os.getenv("FORWARDED_ALLOW_IPS", "127.0.0.1,::1")
+
+HIGH_PRIORITY = "high"
+LOW_PRIORITY = "low"
+
+# Revenue-critical writes get reserved capacity; everything else is shed first
+ROUTE_PRIORITIES = {
+    ("POST", "/api/bookings"): HIGH_PRIORITY,
+}
+
+# Long-lived streams are rate limited on connect but hold no concurrency slot
+UNMETERED_ROUTES = {
+    ("GET", "/api/live"),
+}
+
+# Per-route concurrency limits for browsing traffic
+ROUTE_CONCURRENCY_LIMITS = {
+    ("GET", "/api/rooms"): int(os.getenv("ADMISSION_ROOMS_LIMIT", "24")),
+    ("GET", "/api/dynamic-pricing"): int(os.getenv("ADMISSION_PRICING_LIMIT", "24")),
+}
+
+class TokenBucket:
+    """Per-client token bucket refilled at a constant rate"""
+
+    __slots__ = ("tokens", "updated")
+
+    def __init__(self, now):
+        self.tokens = RATE_LIMIT_BURST
+        self.updated = now
+
+    def take(self, now):
+        self.tokens = min(RATE_LIMIT_BURST, self.tokens + (now - self.updated) * RATE_LIMIT_PER_SECOND)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+class AdmissionController:
+    """Admit, queue or shed requests by priority.
+
+    Low-priority requests may only use the capacity left after the booking
+    reservation, are capped per route, and are shed with 503 once they have
+    queued longer than ADMISSION_LOW_PRIORITY_QUEUE_MS. Booking writes can
+    use the whole capacity and wait longer before being rejected. Each
+    client is also rate limited with a token bucket (429 when empty).
+    """
+
+    def __init__(self):
+        self.in_flight = 0
+        self.route_in_flight = {route: 0 for route in ROUTE_CONCURRENCY_LIMITS}
+        self.buckets = OrderedDict()
+        self._released = None
+        self.stats = {
+            HIGH_PRIORITY: {"admitted": 0, "shed": 0},
+            LOW_PRIORITY: {"admitted": 0, "shed": 0},
+            "rate_limited": 0,
+        }
+
+    def _can_admit(self, route, priority):
+        limit = ADMISSION_MAX_CONCURRENCY
+        if priority != HIGH_PRIORITY:
+            limit -= ADMISSION_RESERVED_FOR_BOOKINGS
+        if self.in_flight >= limit:
+            return False
+        if route in ROUTE_CONCURRENCY_LIMITS and self.route_in_flight[route] >= ROUTE_CONCURRENCY_LIMITS[route]:
+            return False
+        return True
+
+    def _client_key(self, scope):
+        # X-Forwarded-For is client-controlled, so it is never read here;
+        # uvicorn rewrites scope["client"] from it for requests coming from
+        # FORWARDED_ALLOW_IPS
+        client = scope.get("client")
+        return client[0] if client else "unknown"
+
+    def _rate_limited(self, scope, now):
+        key = self._client_key(scope)
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            if len(self.buckets) >= RATE_LIMIT_MAX_CLIENTS:
+                # Evict the least recently seen client
+                self.buckets.popitem(last=False)
+            bucket = self.buckets[key] = TokenBucket(now)
+        else:
+            self.buckets.move_to_end(key)
+        return not bucket.take(now)
+
+    async def _acquire(self, route, priority):
+        """Wait for a slot; return False if the queue deadline passes first"""
+        max_wait_ms = ADMISSION_HIGH_PRIORITY_QUEUE_MS if priority == HIGH_PRIORITY else ADMISSION_LOW_PRIORITY_QUEUE_MS
+        deadline = time.monotonic() + max_wait_ms / 1000
+        while not self._can_admit(route, priority):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            if self._released is None:
+                self._released = asyncio.Event()
+            released = self._released
+            try:
+                await asyncio.wait_for(released.wait(), remaining)
+            except asyncio.TimeoutError:
+                return False
+        self.in_flight += 1
+        if route in self.route_in_flight:
+            self.route_in_flight[route] += 1
+        return True
+
+    def _release(self, route):
+        self.in_flight -= 1
+        if route in self.route_in_flight:
+            self.route_in_flight[route] -= 1
+        # Wake every waiter; each re-checks whether it can be admitted
+        if self._released is not None:
+            self._released.set()
+            self._released = None
+
+    async def _reject(self, send, status_code, detail, retry_after):
+        body = json.dumps({"detail": detail}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": status_code,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(retry_after).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+    async def handle(self, app, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "OPTIONS":
+            await app(scope, receive, send)
+            return
+
+        route = (scope["method"], scope["path"].rstrip("/") or "/")
+        priority = ROUTE_PRIORITIES.get(route, LOW_PRIORITY)
+
+        if self._rate_limited(scope, time.monotonic()):
+            self.stats["rate_limited"] += 1
+            retry_after = max(1, round(1 / RATE_LIMIT_PER_SECOND))
+            await self._reject(send, 429, "Too many requests", retry_after)
+            return
+
+        if route in UNMETERED_ROUTES:
+            await app(scope, receive, send)
+            return
+
+        if not await self._acquire(route, priority):
+            self.stats[priority]["shed"] += 1
+            await self._reject(send, 503, "Server is busy, please retry shortly", ADMISSION_RETRY_AFTER_SECONDS)
+            return
+
+        self.stats[priority]["admitted"] += 1
+        try:
+            await app(scope, receive, send)
+        finally:
+            self._release(route)
+
+    def metrics(self):
+        return {
+            "in_flight": self.in_flight,
+            "max_concurrency": ADMISSION_MAX_CONCURRENCY,
+            "reserved_for_bookings": ADMISSION_RESERVED_FOR_BOOKINGS,
+            "route_in_flight": {f"{method} {path}": count for (method, path), count in self.route_in_flight.items()},
+            **self.stats,
+        }
+
+admission_controller = AdmissionController()
+
+class AdmissionControlMiddleware:
+    """ASGI middleware that routes every request through the admission controller"""
+
+    def __init__(self, app, controller=admission_controller):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send):
+        await self.controller.handle(self.app, scope, receive, send)
@@ -0,0 +1,156 @@
+import asyncio
+import os
+from datetime import date, datetime, timedelta, timezone
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+from bson import ObjectId
+from calendar_index import FEATURE_COLUMNS, stay_calendar, to_ordinal
+
+# Incremental export of bookings into a Parquet training dataset, partitioned
+# by location and check-in year/month:
+#   EXPORT_DIR/location=Chennai/year=2025/month=1/part-<first _id>-0.parquet
+# Each row has the model features plus the realized nightly rate (adr), so
+# retraining can read the dataset directly instead of the static CSV.
+EXPORT_DIR = os.getenv("EXPORT_DIR", os.path.join(os.path.dirname(__file__), "exports", "bookings"))
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "5000"))
+# Only export bookings older than this, so an insert that commits after a
+# newer _id has been exported is not skipped by the high-water mark
+EXPORT_SETTLE_SECONDS = int(os.getenv("EXPORT_SETTLE_SECONDS", "60"))
+
+EXPORT_STATE_ID = "booking_export"
+PARTITION_COLUMNS = ["location", "year", "month"]
+TARGET_COLUMN = "adr"
+
+BOOKING_FIELDS = {"room_id": 1, "location": 1, "check_in": 1, "check_out": 1, "number_of_rooms": 1, "total_price": 1}
+
+EXPORT_SCHEMA = pa.schema(
+    [("booking_id", pa.string()), ("location", pa.string()), ("check_in", pa.string()), ("check_out", pa.string())]
+    + [(column, pa.int64()) for column in FEATURE_COLUMNS]
+    + [("number_of_rooms", pa.int64()), (TARGET_COLUMN, pa.float64())]
+)
+
+# One export at a time; a second caller waits for the first to finish
+_export_lock = asyncio.Lock()
+
+async def get_high_water_mark(db):
+    state = await db.meta.find_one({"_id": EXPORT_STATE_ID}) or {}
+    return state.get("last_booking_id")
+
+async def set_high_water_mark(db, last_id, rows, skipped):
+    await db.meta.update_one(
+        {"_id": EXPORT_STATE_ID},
+        {
+            "$set": {"last_booking_id": last_id, "updated_at": datetime.now(timezone.utc)},
+            "$inc": {"rows_exported": rows, "rows_skipped": skipped}
+        },
+        upsert=True
+    )
+
+def valid_stays(bookings):
+    """Bookings with ISO dates and at least one night, with their check-in/out ordinals"""
+    stays = []
+    for booking in bookings:
+        try:
+            check_in = to_ordinal(booking["check_in"])
+            check_out = to_ordinal(booking["check_out"])
+        except (KeyError, TypeError, ValueError):
+            continue
+        if check_out > check_in:
+            stays.append((booking, check_in, check_out))
+    return stays
+
+def bookings_to_table(stays):
+    """Model features and realized price for (booking, check_in, check_out) stays.
+
+    Holidays for the stays must already be marked in the calendar index.
+    """
+    if not stays:
+        return None
+    bookings = [booking for booking, _, _ in stays]
+    check_ins = np.array([check_in for _, check_in, _ in stays], dtype=np.int64)
+    check_outs = np.array([check_out for _, _, check_out in stays], dtype=np.int64)
+
+    # Note: room_id is used as room_type (0-4), as in the pricing endpoints
+    room_types = np.array([booking["room_id"] - 1 for booking in bookings], dtype=np.int64)
+    features = stay_calendar.feature_frame(check_ins, check_outs, room_types)
+
+    # Realized price per room per night, net of any corporate discount
+    rooms = np.array([booking.get("number_of_rooms", 1) or 1 for booking in bookings], dtype=np.int64)
+    total_prices = np.array([booking.get("total_price", 0) for booking in bookings], dtype=float)
+    adr = total_prices / ((check_outs - check_ins) * rooms)
+
+    columns = {
+        "booking_id": [str(booking["_id"]) for booking in bookings],
+        "location": [booking.get("location") or "unknown" for booking in bookings],
+        "check_in": [booking["check_in"] for booking in bookings],
+        "check_out": [booking["check_out"] for booking in bookings],
+        **{column: features[column].to_numpy(dtype=np.int64) for column in FEATURE_COLUMNS},
+        "number_of_rooms": rooms,
+        TARGET_COLUMN: adr,
+    }
+    return pa.table(columns, schema=EXPORT_SCHEMA)
+
+def write_partitions(table, out_dir, batch_id):
+    """Append a batch to the dataset.
+
+    File names derive from the batch's first _id, so re-running a batch
+    after a crash overwrites its files instead of duplicating rows.
+    """
+    pq.write_to_dataset(
+        table,
+        root_path=out_dir,
+        partition_cols=PARTITION_COLUMNS,
+        basename_template=f"part-{batch_id}-{{i}}.parquet",
+        existing_data_behavior="overwrite_or_ignore",
+    )
+
+async def _export_batch(db, bookings, out_dir, holidays_for, executor):
+    # Bookings with malformed dates or no nights can never be exported; skip
+    # and count them so they do not hold back the mark
+    stays = valid_stays(bookings)
+    if stays and holidays_for is not None:
+        # holidays_for raises when the calendar cannot be read, failing the
+        # batch rather than exporting is_Holiday=0 labels for good
+        start = date.fromordinal(min(check_in for _, check_in, _ in stays)).isoformat()
+        end = date.fromordinal(max(check_out for _, _, check_out in stays)).isoformat()
+        stay_calendar.mark_holidays(await holidays_for(start, end))
+    table = bookings_to_table(stays)
+    if table is not None:
+        await executor.run(write_partitions, table, out_dir, str(bookings[0]["_id"]))
+    rows = table.num_rows if table is not None else 0
+    await set_high_water_mark(db, bookings[-1]["_id"], rows, len(bookings) - rows)
+    return rows, len(bookings) - rows
+
+async def export_new_bookings(db, executor, holidays_for=None, out_dir=EXPORT_DIR, batch_size=EXPORT_BATCH_SIZE):
+    """Export bookings inserted since the stored high-water mark.
+
+    Bookings are read in _id order and written in batches of batch_size,
+    so memory stays bounded however many are pending. The mark is saved
+    after each batch. holidays_for(start, end) returns {date: name} and
+    sets the is_Holiday feature and must raise if they cannot be fetched.
+    Returns the number of rows, skipped bookings and batches.
+    """
+    async with _export_lock:
+        last_id = await get_high_water_mark(db)
+        settled = ObjectId.from_datetime(datetime.now(timezone.utc) - timedelta(seconds=EXPORT_SETTLE_SECONDS))
+        id_range = {"$lt": settled}
+        if last_id is not None:
+            id_range["$gt"] = last_id
+
+        cursor = db.bookings.find({"_id": id_range}, BOOKING_FIELDS).sort("_id", 1).batch_size(batch_size)
+        rows = 0
+        skipped = 0
+        batches = 0
+        batch = []
+        async for booking in cursor:
+            batch.append(booking)
+            if len(batch) >= batch_size:
+                exported, dropped = await _export_batch(db, batch, out_dir, holidays_for, executor)
+                rows, skipped, batches = rows + exported, skipped + dropped, batches + 1
+                batch = []
+        if batch:
+            exported, dropped = await _export_batch(db, batch, out_dir, holidays_for, executor)
+            rows, skipped, batches = rows + exported, skipped + dropped, batches + 1
+
+        return {"rows": rows, "skipped": skipped, "batches": batches, "last_booking_id": str(await get_high_water_mark(db) or "")}
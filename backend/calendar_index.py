@@ -0,0 +1,149 @@
+import time
+import numpy as np
+import pandas as pd
+from datetime import date
+
+# Model feature columns, in the order the Random Forest was trained on
+FEATURE_COLUMNS = ['year', 'day', 'month', 'weekend_nights', 'week_nights', 'room_type', 'is_Holiday']
+
+UNIX_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+def to_ordinal(date_str):
+    """Convert a YYYY-MM-DD string to a proleptic Gregorian day ordinal"""
+    return date.fromisoformat(date_str).toordinal()
+
+def months_between(start_date, end_date):
+    """(year, month) pairs for every month overlapping [start_date, end_date]"""
+    start = date.fromisoformat(start_date)
+    end = date.fromisoformat(end_date)
+    first = start.year * 12 + start.month - 1
+    last = end.year * 12 + end.month - 1
+    return [(index // 12, index % 12 + 1) for index in range(first, last + 1)]
+
+class CalendarIndex:
+    """Day-of-week, weekend and holiday flags stored as arrays keyed by day ordinal.
+
+    Prefix sums over the weekend and holiday flags turn "how many weekend
+    nights" and "is any night a holiday" into O(1) lookups for any stay.
+    The index grows automatically when a date outside the covered span is
+    requested.
+    """
+
+    def __init__(self, start_year=2015, end_year=2035):
+        self.holidays = {}
+        # (year, month) -> time.monotonic() when that month's holidays were fetched
+        self.fetched_months = {}
+        self._build(date(start_year, 1, 1).toordinal(), date(end_year, 12, 31).toordinal())
+
+    def _build(self, first, last):
+        ordinals = np.arange(first, last + 1, dtype=np.int64)
+        self.first = first
+        self.last = last
+        # Ordinal 1 (0001-01-01) is a Monday, so weekday() == (ordinal - 1) % 7
+        self.day_of_week = ((ordinals - 1) % 7).astype(np.int8)
+        self.weekend = (self.day_of_week >= 5).astype(np.int8)
+        self.holiday = np.zeros(len(ordinals), dtype=np.int8)
+        for date_str in self.holidays:
+            ordinal = to_ordinal(date_str)
+            if first <= ordinal <= last:
+                self.holiday[ordinal - first] = 1
+        self._weekend_cumsum = np.concatenate(([0], np.cumsum(self.weekend, dtype=np.int64)))
+        self._refresh_holiday_cumsum()
+
+    def _refresh_holiday_cumsum(self):
+        self._holiday_cumsum = np.concatenate(([0], np.cumsum(self.holiday, dtype=np.int64)))
+
+    def _ensure(self, first, last):
+        """Grow the index so that [first, last] is covered"""
+        if first < self.first or last > self.last:
+            self._build(min(first, self.first), max(last, self.last))
+
+    def mark_holidays(self, holidays):
+        """Flag the given {date_str: name} holidays in the index"""
+        new_dates = [d for d in holidays if d and d not in self.holidays]
+        if not new_dates:
+            return
+        ordinals = [to_ordinal(d) for d in new_dates]
+        self._ensure(min(ordinals), max(ordinals))
+        for date_str, ordinal in zip(new_dates, ordinals):
+            self.holidays[date_str] = holidays[date_str]
+            self.holiday[ordinal - self.first] = 1
+        self._refresh_holiday_cumsum()
+
+    def stale_months(self, start_date, end_date, max_age):
+        """Months overlapping [start, end] not fetched within the last max_age seconds"""
+        now = time.monotonic()
+        return [
+            month for month in months_between(start_date, end_date)
+            if month not in self.fetched_months or now - self.fetched_months[month] >= max_age
+        ]
+
+    def mark_fetched(self, months, holidays):
+        """Record that the holidays of the given months have been fetched"""
+        self.mark_holidays(holidays)
+        now = time.monotonic()
+        for month in months:
+            self.fetched_months[month] = now
+
+    def holidays_between(self, start_date, end_date):
+        """Known {date_str: name} holidays in [start_date, end_date]"""
+        return {day: name for day, name in self.holidays.items() if start_date <= day <= end_date}
+
+    def is_weekend(self, date_str):
+        """Return True if the given date is a weekend (Saturday or Sunday)"""
+        ordinal = to_ordinal(date_str)
+        self._ensure(ordinal, ordinal)
+        return bool(self.weekend[ordinal - self.first])
+
+    def weekend_mask(self, start_ordinal, end_ordinal):
+        """Weekend flags for the nights in [start, end)"""
+        self._ensure(start_ordinal, end_ordinal)
+        return self.weekend[start_ordinal - self.first:end_ordinal - self.first]
+
+    def weekend_nights(self, start_ordinals, end_ordinals):
+        """Number of weekend nights in [start, end); accepts scalars or arrays"""
+        start = np.asarray(start_ordinals, dtype=np.int64)
+        end = np.asarray(end_ordinals, dtype=np.int64)
+        self._ensure(int(start.min()), int(end.max()))
+        return self._weekend_cumsum[end - self.first] - self._weekend_cumsum[start - self.first]
+
+    def holiday_nights(self, start_ordinals, end_ordinals):
+        """Number of flagged holiday nights in [start, end); accepts scalars or arrays"""
+        start = np.asarray(start_ordinals, dtype=np.int64)
+        end = np.asarray(end_ordinals, dtype=np.int64)
+        self._ensure(int(start.min()), int(end.max()))
+        return self._holiday_cumsum[end - self.first] - self._holiday_cumsum[start - self.first]
+
+    def stay_features(self, check_in, check_out):
+        """Calendar features of a single stay, matching the model's feature columns"""
+        check_in_obj = date.fromisoformat(check_in)
+        start = check_in_obj.toordinal()
+        end = to_ordinal(check_out)
+        weekend_nights = int(self.weekend_nights(start, end))
+        return {
+            'year': check_in_obj.year,
+            'day': check_in_obj.day,
+            'month': check_in_obj.month,
+            'weekend_nights': weekend_nights,
+            'week_nights': (end - start) - weekend_nights,
+            'is_Holiday': int(self.holiday_nights(start, end) > 0),
+        }
+
+    def feature_frame(self, start_ordinals, end_ordinals, room_types):
+        """Vectorized model feature frame for many stays at once"""
+        start = np.asarray(start_ordinals, dtype=np.int64)
+        end = np.asarray(end_ordinals, dtype=np.int64)
+        weekend_nights = self.weekend_nights(start, end)
+        check_in_dates = pd.DatetimeIndex(pd.to_datetime(start - UNIX_EPOCH_ORDINAL, unit='D'))
+        return pd.DataFrame({
+            'year': check_in_dates.year.to_numpy(),
+            'day': check_in_dates.day.to_numpy(),
+            'month': check_in_dates.month.to_numpy(),
+            'weekend_nights': weekend_nights,
+            'week_nights': (end - start) - weekend_nights,
+            'room_type': np.broadcast_to(np.asarray(room_types, dtype=np.int64), start.shape),
+            'is_Holiday': (self.holiday_nights(start, end) > 0).astype(np.int64),
+        }, columns=FEATURE_COLUMNS)
+
+# Shared index used by pricing, occupancy and the training/export pipeline
+stay_calendar = CalendarIndex()
@@ -0,0 +1,101 @@
+"""MongoDB connection settings and read routing.
+
+Writes and read-your-write checks go to the primary. Browsing reads
+(rooms, pricing, next available dates, booking lists) use a
+secondary-preferred database handle with bounded staleness, so read
+throughput grows with the number of replica set members.
+
+To try it locally, start a three-node replica set:
+
+    mkdir -p /tmp/rs/{0,1,2}
+    mongod --replSet rs0 --port 27017 --dbpath /tmp/rs/0 --fork --logpath /tmp/rs/0.log
+    mongod --replSet rs0 --port 27018 --dbpath /tmp/rs/1 --fork --logpath /tmp/rs/1.log
+    mongod --replSet rs0 --port 27019 --dbpath /tmp/rs/2 --fork --logpath /tmp/rs/2.log
+    mongosh --port 27017 --eval 'rs.initiate({_id: "rs0", members: [
+        {_id: 0, host: "localhost:27017"}, {_id: 1, host: "localhost:27018"},
+        {_id: 2, host: "localhost:27019"}]})'
+
+then point MONGODB_URI at mongodb://localhost:27017,localhost:27018,localhost:27019/?replicaSet=rs0
+and run `python database.py` to see which members serve primary and
+browsing reads.
+"""
+import asyncio
+import os
+from collections import Counter
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo.read_preferences import ReadPreference, SecondaryPreferred
+
+# Connection pool and timeout settings (per client, per replica set member)
+MONGODB_MAX_POOL_SIZE = int(os.getenv("MONGODB_MAX_POOL_SIZE", "100"))
+MONGODB_MIN_POOL_SIZE = int(os.getenv("MONGODB_MIN_POOL_SIZE", "0"))
+MONGODB_MAX_IDLE_TIME_MS = int(os.getenv("MONGODB_MAX_IDLE_TIME_MS", "300000"))
+MONGODB_WAIT_QUEUE_TIMEOUT_MS = int(os.getenv("MONGODB_WAIT_QUEUE_TIMEOUT_MS", "2000"))
+MONGODB_CONNECT_TIMEOUT_MS = int(os.getenv("MONGODB_CONNECT_TIMEOUT_MS", "5000"))
+MONGODB_SOCKET_TIMEOUT_MS = int(os.getenv("MONGODB_SOCKET_TIMEOUT_MS", "10000"))
+MONGODB_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGODB_SERVER_SELECTION_TIMEOUT_MS", "5000"))
+
+# Browsing reads may be served by a secondary lagging at most this far
+# behind the primary (MongoDB requires at least 90 seconds; -1 disables the bound)
+READ_MAX_STALENESS_SECONDS = int(os.getenv("READ_MAX_STALENESS_SECONDS", "90"))
+READ_FROM_SECONDARIES = os.getenv("READ_FROM_SECONDARIES", "true").lower() == "true"
+
+def create_client(uri):
+    """Motor client with explicit pool sizing and timeouts"""
+    return AsyncIOMotorClient(
+        uri,
+        maxPoolSize=MONGODB_MAX_POOL_SIZE,
+        minPoolSize=MONGODB_MIN_POOL_SIZE,
+        maxIdleTimeMS=MONGODB_MAX_IDLE_TIME_MS,
+        waitQueueTimeoutMS=MONGODB_WAIT_QUEUE_TIMEOUT_MS,
+        connectTimeoutMS=MONGODB_CONNECT_TIMEOUT_MS,
+        socketTimeoutMS=MONGODB_SOCKET_TIMEOUT_MS,
+        serverSelectionTimeoutMS=MONGODB_SERVER_SELECTION_TIMEOUT_MS,
+    )
+
+def browse_read_preference():
+    """Secondary-preferred with bounded staleness, or primary if disabled"""
+    if not READ_FROM_SECONDARIES:
+        return ReadPreference.PRIMARY
+    return SecondaryPreferred(max_staleness=READ_MAX_STALENESS_SECONDS)
+
+def read_database(client, name):
+    """Database handle for browsing reads"""
+    return client.get_database(name, read_preference=browse_read_preference())
+
+def primary(database):
+    """The same database with primary reads, for reads that must see the latest writes"""
+    return database.client.get_database(database.name, read_preference=ReadPreference.PRIMARY)
+
+async def causal_session(client):
+    """Yield a causally consistent session for a request's browsing reads.
+
+    Each read in the session only runs on a member that has caught up with
+    everything earlier reads saw. Reading the catalog version first and
+    the data afterwards therefore never pairs a version with older data,
+    even when the reads land on different secondaries.
+    """
+    async with await client.start_session(causal_consistency=True) as session:
+        yield session
+
+async def describe_routing(uri, name, reads=30):
+    """Count which replica set members answer primary and browsing reads"""
+    client = create_client(uri)
+    try:
+        status = await client.admin.command("replSetGetStatus")
+        members = {member["name"]: member["stateStr"] for member in status["members"]}
+        served = {}
+        for label, database in (("primary", primary(client[name])), ("browse", read_database(client, name))):
+            hosts = Counter()
+            for _ in range(reads):
+                # hello reports the member that answered it
+                hello = await database.command("hello", read_preference=database.read_preference)
+                hosts[hello["me"]] += 1
+            served[label] = dict(hosts)
+        return {"members": members, "served": served}
+    finally:
+        client.close()
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+    load_dotenv()
+    print(asyncio.run(describe_routing(os.getenv("MONGODB_URI"), os.getenv("DB_NAME"))))
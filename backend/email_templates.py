@@ -0,0 +1,251 @@
+from datetime import datetime
+
+def render_booking_confirmation_email(booking_data, room_details):
+    """Render the HTML booking confirmation email (pure, no app state)"""
+    # HTML email template with modern design
+    return f"""
+    <!DOCTYPE html>
+    <html>
+    <head>
+        <meta charset="UTF-8">
+        <meta name="viewport" content="width=device-width, initial-scale=1.0">
+        <style>
+            @import url('https://fonts.googleapis.com/css2?family=Inter:wght@400;600&display=swap');
+            body {{
+                font-family: 'Inter', sans-serif;
+                line-height: 1.6;
+                margin: 0;
+                padding: 0;
+                background-color: #f4f4f5;
+            }}
+            .container {{
+                max-width: 600px;
+                margin: 20px auto;
+                background: white;
+                border-radius: 12px;
+                overflow: hidden;
+                box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
+            }}
+            .header {{
+                background: linear-gradient(135deg, #1e40af, #3b82f6);
+                color: white;
+                padding: 40px 20px;
+                text-align: center;
+            }}
+            .content {{
+                padding: 30px;
+            }}
+            .booking-id {{
+                background: rgba(255, 255, 255, 0.1);
+                padding: 8px 15px;
+                border-radius: 20px;
+                font-size: 14px;
+                margin-top: 10px;
+                display: inline-block;
+            }}
+            .section {{
+                margin: 25px 0;
+                padding: 20px;
+                background: #f8fafc;
+                border-radius: 8px;
+            }}
+            .section-title {{
+                color: #1e40af;
+                font-size: 18px;
+                font-weight: 600;
+                margin-bottom: 15px;
+                display: flex;
+                align-items: center;
+                gap: 8px;
+            }}
+            .detail-row {{
+                display: flex;
+                justify-content: space-between;
+                margin: 8px 0;
+                font-size: 15px;
+            }}
+            .label {{
+                color: #64748b;
+            }}
+            .value {{
+                color: #0f172a;
+                font-weight: 600;
+            }}
+            .important-info {{
+                background: #fef3c7;
+                padding: 15px;
+                border-radius: 8px;
+                margin: 20px 0;
+            }}
+            .footer {{
+                text-align: center;
+                padding: 20px;
+                background: #f8fafc;
+                color: #64748b;
+                font-size: 14px;
+            }}
+            .button {{
+                display: inline-block;
+                padding: 12px 24px;
+                background: #2563eb;
+                color: white;
+                text-decoration: none;
+                border-radius: 6px;
+                font-weight: 600;
+                margin: 20px 0;
+            }}
+            .amenities-grid {{
+                display: grid;
+                grid-template-columns: repeat(2, 1fr);
+                gap: 12px;
+                margin-top: 15px;
+            }}
+            .amenity {{
+                display: flex;
+                align-items: center;
+                background: #f0f9ff;
+                color: #0369a1;
+                padding: 8px 12px;
+                border-radius: 8px;
+                font-size: 13px;
+                gap: 8px;
+            }}
+            .amenity-icon {{
+                color: #0ea5e9;
+                font-size: 16px;
+            }}
+            .contact-section {{
+                text-align: center;
+                padding: 24px;
+                background: #f8fafc;
+                border-radius: 8px;
+                margin: 20px 0;
+            }}
+            .contact-section .section-title {{
+                display: flex;
+                justify-content: center;
+                align-items: center;
+                margin-bottom: 20px;
+                text-align: center;
+                width: 100%;
+            }}
+            .contact-section .section-title span {{
+                display: inline-block;
+                text-align: center;
+            }}
+            .contact-info {{
+                font-size: 15px;
+                line-height: 1.8;
+                color: #334155;
+                text-align: center;
+            }}
+        </style>
+    </head>
+    <body>
+        <div class="container">
+            <div class="header">
+                <h1>Booking Confirmed! 🎉</h1>
+                <div class="booking-id">Booking ID: #{str(booking_data.get('_id', 'TMP-' + datetime.now().strftime('%Y%m%d')))}</div>
+            </div>
+            
+            <div class="content">
+                <p>Dear {booking_data['guest_name']},</p>
+                <p>Thank you for choosing Luxe Resorts. Your reservation has been successfully confirmed.</p>
+                
+                <div class="section">
+                    <div class="section-title">
+                        <span>🏨 Room Details</span>
+                    </div>
+                    <div class="detail-row">
+                        <span class="label">Room Type : </span>
+                        <span class="value"> {room_details['type']}</span>
+                    </div>
+                    <div class="detail-row">
+                        <span class="label">Number of Guests : </span>
+                        <span class="value"> {booking_data['guests']} Guest(s)</span>
+                    </div>
+                    <div class="amenities-grid">
+                        {' '.join(f'''
+                            <div class="amenity">
+                                <span class="amenity-icon">✦ </span>
+                                 {amenity}
+                            </div>
+                        ''' for amenity in room_details.get('amenities', []))}
+                    </div>
+                </div>
+
+                <div class="section">
+                    <div class="section-title">
+                        <span>📅 Stay Duration</span>
+                    </div>
+                    <div class="detail-row">
+                        <span class="label">Check-in : </span>
+                        <span class="value"> {booking_data['check_in']} (from 2:00 PM)</span>
+                    </div>
+                    <div class="detail-row">
+                        <span class="label">Check-out : </span>
+                        <span class="value"> {booking_data['check_out']} (until 11:00 AM)</span>
+                    </div>
+                </div>
+
+                <div class="section">
+                    <div class="section-title">
+                        <span>💰 Payment Details</span>
+                    </div>
+                    <div class="detail-row">
+                        <span class="label">Price per Night : </span>
+                        <span class="value"> ₹{booking_data['price_per_night']:,.2f}</span>
+                    </div>
+                    <div class="detail-row">
+                        <span class="label">Total Amount : </span>
+                        <span class="value"> ₹{booking_data['total_price']:,.2f}</span>
+                    </div>
+                </div>
+
+                <div class="important-info">
+                    <div class="section-title">
+                        <span>ℹ️ Important Information</span>
+                    </div>
+                    <ul style="margin: 0; padding-left: 20px;">
+                        <li>Please present a valid ID and the credit card used for booking during check-in</li>
+                        <li>Early check-in and late check-out are subject to availability</li>
+                        <li>Free cancellation available up to 24 hours before check-in</li>
+                        <li>Free WiFi available throughout the property</li>
+                    </ul>
+                </div>
+
+                <div style="text-align: center;">
+                    <a href="#" class="button" style="text-decoration: none; color: white;">View or Modify Booking</a>
+                </div>
+
+                <div class="contact-section">
+                    <div class="section-title" style="text-align: center; width: 100%;">
+                        <span style="margin: 0 auto;">📍 Contact Information</span>
+                    </div>
+                    <div class="contact-info">
+                        <strong>Hotel Dynamic Pricing</strong><br>
+                        123 Hotel Street<br>
+                        City Name, State 600001<br>
+                        <br>
+                        📞 <a href="tel:+911234567890" style="color: #2563eb; text-decoration: none;">+91 1234567890</a><br>
+                        ✉️ <a href="mailto:support@hotel.com" style="color: #2563eb; text-decoration: none;">support@hotel.com</a>
+                    </div>
+                </div>
+            </div>
+
+            <div class="footer">
+                <p>Need help? Contact our 24/7 customer support</p>
+                <div style="margin-top: 15px;">
+                    <a href="#" style="color: #2563eb; margin: 0 10px;">Facebook</a>
+                    <a href="#" style="color: #2563eb; margin: 0 10px;">Twitter</a>
+                    <a href="#" style="color: #2563eb; margin: 0 10px;">Instagram</a>
+                </div>
+                <p style="margin-top: 20px; font-size: 12px;">
+                    This email was sent to {booking_data['guest_details']['email']}.<br>
+                    © 2024 Hotel Name. All rights reserved.
+                </p>
+            </div>
+        </div>
+    </body>
+    </html>
+    """
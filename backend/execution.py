@@ -0,0 +1,111 @@
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from fastapi import HTTPException
+
+# Execution layer settings
+CPU_THREAD_WORKERS = int(os.getenv("CPU_THREAD_WORKERS", "4"))
+CPU_MAX_QUEUE_DEPTH = int(os.getenv("CPU_MAX_QUEUE_DEPTH", "64"))
+CPU_RETRY_AFTER_SECONDS = int(os.getenv("CPU_RETRY_AFTER_SECONDS", "1"))
+EVENT_LOOP_LAG_INTERVAL_MS = float(os.getenv("EVENT_LOOP_LAG_INTERVAL_MS", "500"))
+
+class BoundedExecutor:
+    """Run blocking work off the event loop with a bounded queue.
+
+    At most max_queue_depth tasks may be queued or running at once. Further
+    submissions are rejected with 503 and a Retry-After header instead of
+    piling up behind the pool.
+    """
+
+    def __init__(self, name, executor_factory, max_queue_depth=CPU_MAX_QUEUE_DEPTH):
+        self.name = name
+        self.max_queue_depth = max_queue_depth
+        self._executor_factory = executor_factory
+        self._executor = None
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+
+    @property
+    def executor(self):
+        if self._executor is None:
+            self._executor = self._executor_factory()
+        return self._executor
+
+    async def run(self, fn, *args, **kwargs):
+        """Run fn(*args, **kwargs) in the pool and await its result"""
+        if self.in_flight >= self.max_queue_depth:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=503,
+                detail="Server is busy, please retry shortly",
+                headers={"Retry-After": str(CPU_RETRY_AFTER_SECONDS)}
+            )
+        self.in_flight += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, partial(fn, *args, **kwargs))
+        finally:
+            self.in_flight -= 1
+            self.completed += 1
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def metrics(self):
+        return {
+            "in_flight": self.in_flight,
+            "max_queue_depth": self.max_queue_depth,
+            "completed": self.completed,
+            "rejected": self.rejected,
+        }
+
+# Work that releases the GIL (NumPy/scikit-learn, blocking I/O) goes to threads.
+# Short pure-Python work (e.g. rendering the confirmation email, a few
+# microseconds) stays on the event loop: shipping it to a process pool
+# costs far more in pickling and IPC than the work itself.
+thread_pool = BoundedExecutor("thread", partial(ThreadPoolExecutor, max_workers=CPU_THREAD_WORKERS, thread_name_prefix="cpu"))
+
+class EventLoopLagMonitor:
+    """Measure how late the event loop wakes up from a fixed-interval sleep"""
+
+    def __init__(self, interval_ms=EVENT_LOOP_LAG_INTERVAL_MS):
+        self.interval = interval_ms / 1000
+        self.samples = 0
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self.total_lag = 0.0
+        self._task = None
+
+    async def _run(self):
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, time.perf_counter() - started - self.interval)
+            self.samples += 1
+            self.last_lag = lag
+            self.max_lag = max(self.max_lag, lag)
+            self.total_lag += lag
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def metrics(self):
+        return {
+            "interval_ms": self.interval * 1000,
+            "last_lag_ms": self.last_lag * 1000,
+            "max_lag_ms": self.max_lag * 1000,
+            "avg_lag_ms": (self.total_lag / self.samples) * 1000 if self.samples else 0,
+        }
+
+event_loop_lag = EventLoopLagMonitor()
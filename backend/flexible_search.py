@@ -0,0 +1,121 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from calendar_index import stay_calendar, to_ordinal
+
+def fancy_round_array(prices):
+    """Vectorized fancy_round: round to the nearest 99 ending"""
+    base = np.round(prices / 100) * 100
+    return np.where(prices > base, base + 99, base - 1)
+
+def room_key(document):
+    """(location, room_id) identifying a room type in rooms and bookings"""
+    return document.get("location"), document["room_id"]
+
+def nightly_occupancy(bookings, room_keys, first_ordinal, days):
+    """Rooms sold per night for each room type, shape (len(room_keys), days)"""
+    row_of = {key: row for row, key in enumerate(room_keys)}
+    delta = np.zeros((len(room_keys), days + 1), dtype=np.int64)
+    for booking in bookings:
+        row = row_of.get(room_key(booking))
+        if row is None:
+            continue
+        # A stay occupies the nights from check-in up to (not including) check-out
+        first = max(to_ordinal(booking["check_in"]) - first_ordinal, 0)
+        last = min(to_ordinal(booking["check_out"]) - first_ordinal, days)
+        if first < last:
+            rooms = booking.get("number_of_rooms", 1)
+            delta[row, first] += rooms
+            delta[row, last] -= rooms
+    return np.cumsum(delta[:, :-1], axis=1)
+
+def stay_occupancy(rooms, bookings, check_in, check_out):
+    """Most rooms sold on any night of [check_in, check_out) for each room.
+
+    This is the availability rule shared by the rooms listing, live updates
+    and flexible search: a booking holds number_of_rooms rooms from its
+    check-in night up to, but not including, its check-out date.
+    """
+    first_ordinal = to_ordinal(check_in)
+    days = to_ordinal(check_out) - first_ordinal
+    if days <= 0:
+        return np.zeros(len(rooms), dtype=np.int64)
+    occupancy = nightly_occupancy(bookings, [room_key(room) for room in rooms], first_ordinal, days)
+    return occupancy.max(axis=1)
+
+def candidate_windows(rooms, bookings, start, end, nights):
+    """Every (room, check-in) stay of the given length inside [start, end].
+
+    Returns (room_index, check_in_ordinal, rooms_left) arrays covering the
+    candidates that still have at least one room free on every night.
+    """
+    first_ordinal = to_ordinal(start)
+    days = to_ordinal(end) - first_ordinal
+    if days < nights:
+        empty = np.array([], dtype=np.int64)
+        return empty, empty, empty
+
+    total_rooms = np.array([room.get("total_rooms", 0) for room in rooms], dtype=np.int64)
+    occupancy = nightly_occupancy(bookings, [room_key(room) for room in rooms], first_ordinal, days)
+
+    # Peak occupancy over each stay window, shape (rooms, check-in dates)
+    peak = sliding_window_view(occupancy, nights, axis=1).max(axis=2)
+    rooms_left = total_rooms[:, None] - peak
+    room_index, offset = np.nonzero(rooms_left > 0)
+    return room_index, first_ordinal + offset, rooms_left[room_index, offset]
+
+def daily_occupancy_rates(bookings, total_rooms, first_ordinal, days):
+    """Occupancy rate per day used by rule-based pricing, shape (days,).
+
+    Counts bookings active on each day (check-in through check-out
+    inclusive) over the number of room types, plus 0.2 on weekends,
+    capped at 1. A stay's occupancy rate is the mean over its nights.
+    """
+    active_delta = np.zeros(days + 1, dtype=np.int64)
+    for booking in bookings:
+        first = max(to_ordinal(booking["check_in"]) - first_ordinal, 0)
+        last = min(to_ordinal(booking["check_out"]) - first_ordinal, days - 1)
+        if first <= last:
+            active_delta[first] += 1
+            active_delta[last + 1] -= 1
+    day_occupancy = np.cumsum(active_delta[:-1]) / total_rooms
+
+    weekend = stay_calendar.weekend_mask(first_ordinal, first_ordinal + days).astype(bool)
+    day_occupancy[weekend] = np.minimum(1.0, day_occupancy[weekend] + 0.2)
+    return day_occupancy
+
+def stay_occupancy_rates(daily_rates, first_ordinal, check_in_ordinals, nights):
+    """Mean occupancy rate over each stay, from daily_occupancy_rates"""
+    window_rates = sliding_window_view(daily_rates, nights).mean(axis=1)
+    return window_rates[check_in_ordinals - first_ordinal]
+
+def fallback_prices(base_prices, check_in_ordinals, nights, occupancy_rates, factors):
+    """Rule-based nightly prices used when the model is unavailable.
+
+    Applies the same multipliers as the pricing endpoint: holiday, else
+    weekend, else a low-occupancy discount or high-occupancy premium.
+    """
+    check_out_ordinals = check_in_ordinals + nights
+    multiplier = np.select(
+        [
+            stay_calendar.holiday_nights(check_in_ordinals, check_out_ordinals) > 0,
+            stay_calendar.weekend_nights(check_in_ordinals, check_out_ordinals) > 0,
+            occupancy_rates < 0.5,
+            occupancy_rates > 0.8,
+        ],
+        [
+            factors["holiday_multiplier"],
+            factors["weekend_multiplier"],
+            factors["low_occupancy_discount"],
+            factors["high_occupancy_premium"],
+        ],
+        default=1.0
+    )
+    return base_prices * multiplier
+
+def cheapest_windows(total_prices, top_k):
+    """Indices of the top_k lowest totals, cheapest first"""
+    if len(total_prices) > top_k:
+        candidates = np.argpartition(total_prices, top_k - 1)[:top_k]
+    else:
+        candidates = np.arange(len(total_prices))
+    return candidates[np.argsort(total_prices[candidates], kind="stable")]
@@ -0,0 +1,107 @@
+import gzip
+import hashlib
+import json
+import os
+from fastapi import Response
+from serialization import encode_json
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; fall back to gzip only
+    brotli = None
+
+# Responses smaller than this are sent uncompressed
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+
+CATALOG_VERSION_ID = "catalog"
+
+# Content-codings a response may be sent with; each gets its own ETag
+CONTENT_CODINGS = ("gzip", "br")
+
+def catalog_version_id(location=None):
+    """Version document id for the whole chain or for a single location"""
+    return f"{CATALOG_VERSION_ID}:{location}" if location else CATALOG_VERSION_ID
+
+async def get_catalog_version(db, location=None, session=None):
+    """Return the (rooms, bookings) version counters of the catalog or one location"""
+    meta = await db.meta.find_one({"_id": catalog_version_id(location)}, session=session) or {}
+    return meta.get("rooms_version", 0), meta.get("bookings_version", 0)
+
+async def bump_catalog_version(db, field, *locations):
+    """Invalidate cached responses after rooms or bookings change.
+
+    The chain-wide version is always bumped, along with the version of each
+    affected location, so a change in one property leaves the others cached.
+    """
+    for version_id in [catalog_version_id()] + [catalog_version_id(location) for location in locations]:
+        await db.meta.update_one({"_id": version_id}, {"$inc": {field: 1}}, upsert=True)
+
+def make_etag(*parts):
+    """Strong ETag derived from the response inputs rather than the rendered body"""
+    digest = hashlib.sha256(json.dumps(parts, default=str, sort_keys=True).encode()).hexdigest()
+    return f'"{digest[:32]}"'
+
+def coded_etag(etag, encoding):
+    """ETag of the representation sent with the given content-coding.
+
+    A strong validator must differ between byte-different bodies, so the
+    gzip and br variants get a suffix on the identity ETag.
+    """
+    return f'{etag[:-1]}-{encoding}"' if encoding else etag
+
+def etag_matches(request, etag):
+    """Return the If-None-Match tag matching any coding of the ETag, or None"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return None
+    variants = [coded_etag(etag, encoding) for encoding in (None,) + CONTENT_CODINGS]
+    for tag in header.split(","):
+        tag = tag.strip()
+        # If-None-Match uses weak comparison, so ignore any W/ prefix
+        tag = tag[2:] if tag.startswith("W/") else tag
+        if tag == "*":
+            return etag
+        if tag in variants:
+            return tag
+    return None
+
+def choose_encoding(request):
+    """Pick the best compression the client accepts"""
+    accepted = {}
+    for item in request.headers.get("accept-encoding", "").split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            accepted[name.lower()] = quality
+    if brotli is not None and accepted.get("br", 0) > 0:
+        return "br"
+    if accepted.get("gzip", 0) > 0:
+        return "gzip"
+    return None
+
+def not_modified_response(etag):
+    return Response(status_code=304, headers={"ETag": etag, "Vary": "Accept-Encoding", "Cache-Control": "no-cache"})
+
+def cached_json_response(request, etag, payload):
+    """Encode payload as JSON with an ETag, compressing larger bodies.
+
+    With etag=None the response is marked no-store and carries no ETag,
+    for degraded results that must not be revalidated or reused.
+    """
+    body = encode_json(payload)
+    headers = {"Vary": "Accept-Encoding", "Cache-Control": "no-cache" if etag else "no-store"}
+    encoding = choose_encoding(request) if len(body) >= COMPRESSION_MIN_SIZE else None
+    if encoding == "br":
+        body = brotli.compress(body, quality=4)
+        headers["Content-Encoding"] = "br"
+    elif encoding == "gzip":
+        body = gzip.compress(body, compresslevel=6)
+        headers["Content-Encoding"] = "gzip"
+    if etag:
+        headers["ETag"] = coded_etag(etag, encoding)
+    return Response(content=body, media_type="application/json", headers=headers)
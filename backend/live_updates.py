@@ -0,0 +1,123 @@
+import asyncio
+import os
+from serialization import encode_json
+
+# Live update settings
+LIVE_MAX_SUBSCRIBERS = int(os.getenv("LIVE_MAX_SUBSCRIBERS", "5000"))
+LIVE_QUEUE_SIZE = int(os.getenv("LIVE_QUEUE_SIZE", "32"))
+LIVE_KEEPALIVE_SECONDS = float(os.getenv("LIVE_KEEPALIVE_SECONDS", "15"))
+
+class Subscription:
+    """One connected client watching a location and stay dates"""
+
+    __slots__ = ("location", "check_in", "check_out", "queue", "lagged")
+
+    def __init__(self, location, check_in, check_out):
+        self.location = location
+        self.check_in = check_in
+        self.check_out = check_out
+        self.queue = asyncio.Queue(maxsize=LIVE_QUEUE_SIZE)
+        self.lagged = False
+
+class LiveUpdateHub:
+    """In-process pub/sub that fans inventory changes out to subscribers.
+
+    Subscribers are grouped by location and then by stay dates, so a
+    booking only touches clients watching that property and an
+    overlapping range. Idle clients cost one queue each.
+    """
+
+    def __init__(self):
+        self.subscribers = {}
+        self.subscriber_count = 0
+        self._tasks = set()
+        self.published = 0
+        self.delivered = 0
+        self.dropped = 0
+
+    def subscribe(self, location, check_in, check_out):
+        subscription = Subscription(location, check_in, check_out)
+        groups = self.subscribers.setdefault(location, {})
+        groups.setdefault((check_in, check_out), set()).add(subscription)
+        self.subscriber_count += 1
+        return subscription
+
+    def unsubscribe(self, subscription):
+        groups = self.subscribers.get(subscription.location, {})
+        key = (subscription.check_in, subscription.check_out)
+        group = groups.get(key)
+        if group is not None and subscription in group:
+            group.discard(subscription)
+            self.subscriber_count -= 1
+            if not group:
+                del groups[key]
+        if not groups:
+            self.subscribers.pop(subscription.location, None)
+
+    def ranges_for(self, location, check_in, check_out):
+        """Distinct subscribed stay ranges at a location that overlap the dates"""
+        return [
+            (start, end) for start, end in self.subscribers.get(location, {})
+            if start <= check_out and check_in <= end
+        ]
+
+    def publish(self, location, check_in, check_out, event, data):
+        """Queue an event for every subscriber of the given location and range"""
+        self.published += 1
+        message = format_event(event, data)
+        for subscription in self.subscribers.get(location, {}).get((check_in, check_out), ()):
+            try:
+                subscription.queue.put_nowait(message)
+                self.delivered += 1
+            except asyncio.QueueFull:
+                # Slow client: drop the update and ask it to refetch instead
+                subscription.lagged = True
+                self.dropped += 1
+
+    def spawn(self, coro):
+        """Run a publishing coroutine in the background, keeping a reference to it"""
+        task = asyncio.ensure_future(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def metrics(self):
+        return {
+            "subscribers": self.subscriber_count,
+            "max_subscribers": LIVE_MAX_SUBSCRIBERS,
+            "published": self.published,
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+        }
+
+def format_event(event, data):
+    """Encode a server-sent event frame"""
+    return b"event: " + event.encode() + b"\ndata: " + encode_json(data) + b"\n\n"
+
+async def event_stream(hub, location, check_in, check_out):
+    """Subscribe and yield SSE frames until the client goes away.
+
+    The subscription is made on the first iteration, so a client that
+    disconnects before the stream starts never holds one. The response
+    cancels this generator when the client disconnects.
+    """
+    subscription = hub.subscribe(location, check_in, check_out)
+    try:
+        yield format_event("ready", {
+            "location": subscription.location,
+            "check_in": subscription.check_in,
+            "check_out": subscription.check_out
+        })
+        while True:
+            if subscription.lagged:
+                subscription.lagged = False
+                yield format_event("resync", {"reason": "updates dropped"})
+            try:
+                message = await asyncio.wait_for(subscription.queue.get(), LIVE_KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield b": keepalive\n\n"
+                continue
+            yield message
+    finally:
+        hub.unsubscribe(subscription)
+
+live_updates = LiveUpdateHub()
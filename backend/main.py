@@ -1,25 +1,50 @@
-from fastapi import FastAPI, HTTPException, Query, Depends
+from fastapi import FastAPI, HTTPException, Query, Depends, Request
+from fastapi.responses import StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 from typing import List, Optional
 import os, httpx
+import asyncio
 import json
+import time
 import joblib
 import numpy as np
 from dotenv import load_dotenv
-from motor.motor_asyncio import AsyncIOMotorClient
 from bson import ObjectId
+from pymongo.errors import BulkWriteError
 from sklearn.ensemble import RandomForestRegressor
 from googleapiclient.discovery import build
 import pandas as pd
 import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
+from calendar_index import stay_calendar, to_ordinal
+from model_serving import ModelBatcher
+from model_tiers import load_model_tier
+from execution import thread_pool, event_loop_lag
+from email_templates import render_booking_confirmation_email
+from serialization import PriceFactors, RoomPrice, RoomStats, BookingCreated, StayOption, FastJSONResponse
+from rollups import create_rollup_indexes, record_booking, rebuild_rollups, query_rollups
+from admission import AdmissionControlMiddleware, admission_controller, PROXY_HEADERS, FORWARDED_ALLOW_IPS
+from flexible_search import (
+    nightly_occupancy, room_key, stay_occupancy, candidate_windows, daily_occupancy_rates, stay_occupancy_rates,
+    fallback_prices, fancy_round_array, cheapest_windows
+)
+from database import create_client, read_database, primary, causal_session
+from booking_export import export_new_bookings
+from live_updates import live_updates, event_stream, LIVE_MAX_SUBSCRIBERS
+from http_cache import get_catalog_version, bump_catalog_version, make_etag, etag_matches, not_modified_response, cached_json_response
+from structured_logging import logging_system, get_logger
 
 # Load environment variables
 load_dotenv()
 
+# JSON logs are written by a background thread so handlers never block on I/O
+logging_system.configure()
+logger = get_logger("api")
+holiday_logger = get_logger("holidays")
+
 # Load the pre-trained Random Forest model
 try:
     model_path = os.path.join(os.path.dirname(__file__), "random_forest_model_steve1.pkl")
@@ -27,7 +52,31 @@ try:
 except Exception as e:
     rf_model = None
 
-app = FastAPI(title="Hotel Dynamic Pricing API")
+# Model tier used on the hot path: "full" for rf_model, or a tier trained
+# with model_tiers.py (shallow_forest, single_tree, boosted_stumps, price_table)
+PRICING_MODEL_TIER = os.getenv("PRICING_MODEL_TIER", "full")
+MODEL_TIERS_DIR = os.getenv("MODEL_TIERS_DIR", os.path.join(os.path.dirname(__file__), "models"))
+
+fast_model = None
+if rf_model is not None and PRICING_MODEL_TIER != "full":
+    try:
+        fast_model = load_model_tier(PRICING_MODEL_TIER, MODEL_TIERS_DIR)
+    except Exception as e:
+        fast_model = None
+    if fast_model is None:
+        logger.warning("Pricing model tier not available, serving the full forest", extra={"tier": PRICING_MODEL_TIER})
+
+# Batches model inference across concurrent pricing requests. The hot path
+# uses the fast tier when one is loaded; precise requests use the full forest.
+precise_batcher = ModelBatcher(rf_model, executor=thread_pool) if rf_model is not None else None
+model_batcher = ModelBatcher(fast_model, executor=thread_pool) if fast_model is not None else precise_batcher
+hot_path_model = PRICING_MODEL_TIER if fast_model is not None else "random_forest"
+
+app = FastAPI(title="Hotel Dynamic Pricing API", default_response_class=FastJSONResponse)
+
+# Shed low-priority reads under overload; added before CORS so rejections
+# still carry CORS headers
+app.add_middleware(AdmissionControlMiddleware)
 
 # Enable CORS
 app.add_middleware(
@@ -46,9 +95,15 @@ app.add_middleware(
 MONGODB_URI = os.getenv("MONGODB_URI")
 DB_NAME = os.getenv("DB_NAME")
 
-# MongoDB client instance
-client = AsyncIOMotorClient(MONGODB_URI)
+# Properties in the chain; location is the partition key for rooms and bookings
+HOTEL_LOCATIONS = [location.strip() for location in os.getenv("HOTEL_LOCATIONS", "Madurai,Hyderabad,Bangalore").split(",") if location.strip()]
+SHARD_BOOKINGS_BY_LOCATION = os.getenv("SHARD_BOOKINGS_BY_LOCATION", "false").lower() == "true"
+
+# MongoDB client instance; db reads from the primary, read_db may be
+# served by a secondary within READ_MAX_STALENESS_SECONDS
+client = create_client(MONGODB_URI)
 db = client[DB_NAME]
+read_db = read_database(client, DB_NAME)
 
 # Models
 class PyObjectId(ObjectId):
@@ -82,8 +137,10 @@ class RoomModel(BaseModel):
             ObjectId: str
         }
 
+# Documents the pricing response schema; responses are built with serialization.RoomPrice
 class RoomPricing(BaseModel):
     room_id: int
+    location: Optional[str] = None
     price: float
     base_price: float
     price_factors: dict
@@ -107,12 +164,63 @@ class Booking(BaseModel):
     number_of_rooms: int
     price_per_night: float
     total_price: float
+    location: Optional[str] = None
     guest_details: Optional[GuestDetails] = None
 
-# Database dependency
+@app.on_event("startup")
+async def start_execution_layer():
+    event_loop_lag.start()
+
+@app.on_event("shutdown")
+async def stop_execution_layer():
+    event_loop_lag.stop()
+    thread_pool.shutdown()
+    logging_system.stop()
+
+@app.on_event("startup")
+async def create_location_indexes():
+    """Index rooms and bookings by location so queries stay scoped to one property"""
+    try:
+        await db.rooms.create_index([("location", 1), ("room_id", 1)], unique=True)
+        await db.bookings.create_index([("location", 1), ("room_id", 1), ("check_in", 1), ("check_out", 1)])
+        await db.bookings.create_index([("location", 1), ("check_out", 1)])
+        if SHARD_BOOKINGS_BY_LOCATION:
+            # shardCollection needs an index that starts with the shard key
+            await db.bookings.create_index([("location", 1), ("check_in", 1)])
+            await client.admin.command("enableSharding", DB_NAME)
+            await client.admin.command(
+                "shardCollection", f"{DB_NAME}.bookings",
+                key={"location": 1, "check_in": 1}
+            )
+    except Exception as e:
+        logger.exception("Error creating location indexes")
+
+@app.on_event("startup")
+async def create_rollup_collection_indexes():
+    """Rollup indexes; startup fails without them.
+
+    The unique index is what keeps record_booking from counting a booking
+    twice, so serving without it would silently corrupt the rollups.
+    """
+    await create_rollup_indexes(db)
+
+# Database dependencies
 async def get_db():
     return db
 
+async def get_read_db():
+    return read_db
+
+async def get_read_session():
+    async for session in causal_session(client):
+        yield session
+
+def normalize_location(location):
+    """Treat a missing or blank location as 'all locations'"""
+    if location and location.strip():
+        return location.strip()
+    return None
+
 # Setup Google Calendar API
 SCOPES = ['https://www.googleapis.com/auth/calendar.readonly']
 
@@ -125,88 +233,114 @@ def get_google_calendar_service():
     service = build('calendar', 'v3', developerKey=api_key)
     return service
 
-async def get_holidays(start_date, end_date):
-    """Get holidays between the given dates using the Tamil holidays calendar"""
-    try:
-        service = get_google_calendar_service()
+# Changed to Tamil Nadu holidays calendar ID
+HOLIDAY_CALENDAR_ID = 'en.indian#holiday@group.v.calendar.google.com'
+# Fetched months are reused for this long before asking Google again
+HOLIDAY_CACHE_SECONDS = int(os.getenv("HOLIDAY_CACHE_SECONDS", "86400"))
+# After a failed fetch, serve cached holidays for this long before retrying
+HOLIDAY_RETRY_SECONDS = int(os.getenv("HOLIDAY_RETRY_SECONDS", "60"))
+
+holiday_fetch_lock = asyncio.Lock()
+holiday_fetch_failed_at = None
+
+def list_holiday_events(time_min, time_max):
+    """Every event in the range, following nextPageToken (blocking)"""
+    service = get_google_calendar_service()
+    events = []
+    page_token = None
+    while True:
         events_result = service.events().list(
-            # Changed to Tamil Nadu holidays calendar ID
-            calendarId='en.indian#holiday@group.v.calendar.google.com',
-            timeMin=start_date + 'T00:00:00Z',
-            timeMax=end_date + 'T23:59:59Z',
+            calendarId=HOLIDAY_CALENDAR_ID,
+            timeMin=time_min,
+            timeMax=time_max,
             singleEvents=True,
-            orderBy='startTime'
+            orderBy='startTime',
+            maxResults=2500,
+            pageToken=page_token
         ).execute()
-        
-        # Add detailed logging
-        print("Google Calendar API Response:", events_result)
-        
-        events = events_result.get('items', [])
-        if not events:
-            print("No Tamil holidays found in the date range")
-        else:
-            print(f"Found {len(events)} Tamil holidays")
-            
-        holidays = {}
-        for event in events:
-            start = event['start'].get('date')
-            holidays[start] = event['summary']
-            print(f"Tamil Holiday found: {start} - {event['summary']}")
-            
+        events.extend(events_result.get('items', []))
+        page_token = events_result.get('nextPageToken')
+        if not page_token:
+            return events
+
+async def fetch_holidays(start_date, end_date):
+    """Holidays between the given dates, fetched by whole month and cached in the calendar index.
+
+    Raises if the calendar cannot be read, so callers can tell "no
+    holidays" apart from "holidays unknown".
+    """
+    if stay_calendar.stale_months(start_date, end_date, HOLIDAY_CACHE_SECONDS):
+        async with holiday_fetch_lock:
+            # Another request may have fetched the same months while we waited
+            months = stay_calendar.stale_months(start_date, end_date, HOLIDAY_CACHE_SECONDS)
+            if months:
+                (first_year, first_month), (last_year, last_month) = months[0], months[-1]
+                next_month = date(last_year + last_month // 12, last_month % 12 + 1, 1)
+                # The Google client is synchronous; run the HTTP calls off the event loop
+                events = await thread_pool.run(
+                    list_holiday_events,
+                    date(first_year, first_month, 1).isoformat() + 'T00:00:00Z',
+                    (next_month - timedelta(days=1)).isoformat() + 'T23:59:59Z'
+                )
+                holidays = {event['start']['date']: event['summary'] for event in events if event['start'].get('date')}
+                stay_calendar.mark_fetched(months, holidays)
+                holiday_logger.debug("Fetched Tamil holidays", extra={
+                    "months": len(months), "count": len(holidays), "holidays": holidays
+                })
+    return stay_calendar.holidays_between(start_date, end_date)
+
+async def get_holidays(start_date, end_date):
+    """Get holidays between the given dates using the Tamil holidays calendar"""
+    global holiday_fetch_failed_at
+    if holiday_fetch_failed_at is not None and time.monotonic() - holiday_fetch_failed_at < HOLIDAY_RETRY_SECONDS:
+        return stay_calendar.holidays_between(start_date, end_date)
+    try:
+        holidays = await fetch_holidays(start_date, end_date)
+        holiday_fetch_failed_at = None
         return holidays
     except Exception as e:
-        print(f"Error fetching Tamil holidays: {str(e)}")
-        return {}
+        # Fall back to whatever is cached rather than failing the request
+        holiday_fetch_failed_at = time.monotonic()
+        holiday_logger.warning("Error fetching Tamil holidays", extra={"error": str(e)})
+        return stay_calendar.holidays_between(start_date, end_date)
 
 def is_weekend(date_str):
     """Return True if the given date is a weekend (Saturday or Sunday)"""
-    date_obj = datetime.strptime(date_str, '%Y-%m-%d')
-    return date_obj.weekday() >= 5
+    return stay_calendar.is_weekend(date_str)
 
-async def calculate_occupancy_rate(db, check_in_date, check_out_date):
+async def calculate_occupancy_rate(db, check_in_date, check_out_date, location=None, session=None):
     """Calculate occupancy rate based on actual bookings in the database"""
-    start_date = datetime.strptime(check_in_date, '%Y-%m-%d')
-    end_date = datetime.strptime(check_out_date, '%Y-%m-%d')
+    start_ordinal = to_ordinal(check_in_date)
+    end_ordinal = to_ordinal(check_out_date)
+    
+    # Scope rooms and bookings to a single location when one is given
+    location_filter = {"location": location} if location else {}
     
     # Get total room count
-    total_rooms = await db.rooms.count_documents({})
+    total_rooms = await db.rooms.count_documents(location_filter, session=session)
     if total_rooms == 0:
         return 0.6  # Default if no rooms in database
     
     # Get bookings that overlap with the date range
     bookings = await db.bookings.find({
+        **location_filter,
         "$or": [
             {
                 "check_in": {"$lte": check_out_date},
                 "check_out": {"$gte": check_in_date}
             }
         ]
-    }).to_list(length=None)
+    }, session=session).to_list(length=None)
     
     # Calculate occupancy for each day in the range
-    days = (end_date - start_date).days
+    days = end_ordinal - start_ordinal
     if days <= 0:
         return 0.6
     
-    total_occupancy = 0
-    current_date = start_date
-    
-    while current_date < end_date:
-        date_str = current_date.strftime('%Y-%m-%d')
-        # Count bookings active on this date
-        active_bookings = sum(1 for booking in bookings if 
-                             booking['check_in'] <= date_str <= booking['check_out'])
-        
-        day_occupancy = active_bookings / total_rooms
-        
-        # Add weekend boost if applicable
-        if is_weekend(date_str):
-            day_occupancy = min(1.0, day_occupancy + 0.2)
-            
-        total_occupancy += day_occupancy
-        current_date += timedelta(days=1)
+    # Same daily rates flexible search uses for its rule-based prices
+    day_occupancy = daily_occupancy_rates(bookings, total_rooms, start_ordinal, days)
     
-    return total_occupancy / days
+    return float(day_occupancy.sum() / days)
 
 # Pricing factors (fallback multipliers)
 PRICING_FACTORS = {
@@ -225,6 +359,85 @@ ROOM_BASE_PRICES = {
     4: 14599  # Presidential Suite
 }
 
+# Default room types seeded for every location
+BASE_ROOMS = [
+    {
+        "room_id": 1,  # Standard Single
+        "type": "Standard Single",
+        "base_price": 2499,
+        "total_rooms": 5,
+        "description": "Cozy room with a single bed, perfect for solo travelers.",
+        "amenities": ["Free Wi-Fi", "TV", "Air Conditioning", "Work Desk", "Daily Housekeeping"],
+        "capacity": 1,
+        "image_url": "https://images.unsplash.com/photo-1566665797739-1674de7a421a?ixlib=rb-4.0.3"
+    },
+    {
+        "room_id": 2,  # Standard Double
+        "type": "Standard Double",
+        "base_price": 3999,
+        "total_rooms": 8,
+        "description": "Comfortable room with a queen-size bed, ideal for couples.",
+        "amenities": ["Free Wi-Fi", "TV", "Air Conditioning", "Mini Fridge", "Coffee Maker", "Work Desk", "Daily Housekeeping"],
+        "capacity": 2,
+        "image_url": "https://images.unsplash.com/photo-1590490360182-c33d57733427?ixlib=rb-4.0.3"
+    },
+    {
+        "room_id": 3,  # Deluxe
+        "type": "Deluxe",
+        "base_price": 5599,
+        "total_rooms": 4,
+        "description": "Spacious deluxe room with premium amenities and city views.",
+        "amenities": ["Free Wi-Fi", "Large TV", "Air Conditioning", "Mini Fridge", "Coffee Maker", "Room Service", "City View", "Premium Toiletries"],
+        "capacity": 2,
+        "image_url": "https://images.unsplash.com/photo-1578683010236-d716f9a3f461?ixlib=rb-4.0.3"
+    },
+    {
+        "room_id": 4,  # Suite
+        "type": "Suite",
+        "base_price": 7499,
+        "total_rooms": 2,
+        "description": "Luxurious suite with separate living area and premium amenities.",
+        "amenities": ["Free Wi-Fi", "Large TV", "Air Conditioning", "Mini Bar", "Room Service", "Jacuzzi", "City View", "Premium Toiletries", "Separate Living Area"],
+        "capacity": 3,
+        "image_url": "https://images.unsplash.com/photo-1582719478250-c89cae4dc85b?ixlib=rb-4.0.3"
+    },
+    {
+        "room_id": 5,  # Presidential Suite
+        "type": "Presidential Suite",
+        "base_price": 14599,
+        "total_rooms": 1,
+        "description": "Our most exclusive accommodation with panoramic views and luxury amenities.",
+        "amenities": ["Free Wi-Fi", "Large TV", "Air Conditioning", "Full Bar", "24/7 Room Service", "Jacuzzi", "Private Balcony", "Panoramic View", "Butler Service", "Private Dining"],
+        "capacity": 4,
+        "image_url": "https://images.unsplash.com/photo-1631049307264-da0ec9d70304?ixlib=rb-4.0.3"
+    }
+]
+
+async def ensure_rooms_seeded(db, location=None):
+    """Insert the default rooms for any configured location that has none"""
+    locations = [location] if location else HOTEL_LOCATIONS
+    existing = set(await db.rooms.distinct("location", {"location": {"$in": locations}}))
+    default_rooms = [
+        {
+            **room,  # Spread the base room properties
+            "location": room_location  # Add location
+        }
+        for room_location in locations if room_location in HOTEL_LOCATIONS and room_location not in existing
+        for room in BASE_ROOMS
+    ]
+    if default_rooms:
+        try:
+            await db.rooms.insert_many(default_rooms, ordered=False)
+        except BulkWriteError:
+            pass  # Another request seeded the same location concurrently
+        await bump_catalog_version(db, "rooms_version", *{room["location"] for room in default_rooms})
+
+def unseeded_locations(rooms, location=None):
+    """Configured locations in scope (one, or all) without any of the given rooms"""
+    locations = [location] if location else HOTEL_LOCATIONS
+    present = {room.get("location") for room in rooms}
+    return [room_location for room_location in locations if room_location in HOTEL_LOCATIONS and room_location not in present]
+
 def fancy_round(price):
     """Round price to nearest 99/98 ending"""
     # Round to nearest hundred first
@@ -237,6 +450,99 @@ def fancy_round(price):
     else:
         return (base - 100) + 99
 
+async def price_rooms(rooms, check_in, check_out, occupancy_rate, precise=False):
+    """Price the given rooms for a stay, using the model when it is loaded.
+
+    Holidays must already be marked in the calendar index. precise=True
+    scores with the full forest instead of the hot-path tier.
+    """
+    batcher = precise_batcher if precise else model_batcher
+    model_name = "random_forest" if precise else hot_path_model
+    # Calendar features are the same for every room, so look them up once
+    stay = stay_calendar.stay_features(check_in, check_out)
+    weekend_nights = stay['weekend_nights']
+    week_nights = stay['week_nights']
+    is_holiday = stay['is_Holiday']
+    
+    rooms = [room for room in rooms if "room_id" in room and "base_price" in room]
+    
+    # Score all rooms in one call; the batcher also merges concurrent requests
+    predictions = None
+    prediction_error = None
+    if batcher is not None:
+        # Note: room_id is used as room_type (0-4)
+        features = pd.DataFrame({
+            'year': stay['year'],
+            'day': stay['day'],
+            'month': stay['month'],
+            'weekend_nights': weekend_nights,
+            'week_nights': week_nights,
+            'room_type': [room["room_id"] - 1 for room in rooms],
+            'is_Holiday': is_holiday
+        })
+        try:
+            predictions = await batcher.predict(features)
+        except HTTPException:
+            raise
+        except Exception as e:
+            prediction_error = str(e)
+    
+    result = []
+    
+    for index, room in enumerate(rooms):
+        try:
+            room_id = room["room_id"]
+            base_price = room["base_price"]
+            
+            # If model loaded correctly, use it. Otherwise, fallback to rule-based pricing.
+            if batcher is not None:
+                if predictions is not None:
+                    predicted_price = predictions[index]
+                    final_price = fancy_round(predicted_price)
+                    factors = PriceFactors(
+                        model=model_name,
+                        year=stay['year'],
+                        month=stay['month'],
+                        weekend_nights=weekend_nights,
+                        week_nights=week_nights,
+                        room_type=room_id - 1,
+                        is_holiday=bool(is_holiday)
+                    )
+                else:
+                    # Fallback to rule-based pricing
+                    final_price = base_price
+                    factors = PriceFactors(model="fallback", error=prediction_error)
+            else:
+                # Fallback rule-based pricing logic
+                final_price = base_price
+                factors = PriceFactors(model="fallback")
+                if is_holiday:
+                    final_price *= PRICING_FACTORS["holiday_multiplier"]
+                    factors.holiday = PRICING_FACTORS["holiday_multiplier"]
+                elif weekend_nights > 0:
+                    final_price *= PRICING_FACTORS["weekend_multiplier"]
+                    factors.weekend = PRICING_FACTORS["weekend_multiplier"]
+                else:
+                    if occupancy_rate < 0.5:
+                        final_price *= PRICING_FACTORS["low_occupancy_discount"]
+                        factors.low_occupancy = PRICING_FACTORS["low_occupancy_discount"]
+                    elif occupancy_rate > 0.8:
+                        final_price *= PRICING_FACTORS["high_occupancy_premium"]
+                        factors.high_occupancy = PRICING_FACTORS["high_occupancy_premium"]
+                final_price = fancy_round(final_price)
+            
+            result.append(RoomPrice(
+                room_id=room_id,
+                location=room.get("location"),
+                price=float(final_price),
+                base_price=float(base_price),
+                price_factors=factors
+            ))
+        except Exception as e:
+            continue  # Skip this room and continue with others
+    
+    return result
+
 @app.get("/")
 async def root():
     """Root endpoint that provides API information"""
@@ -248,7 +554,12 @@ async def root():
             "dynamic_pricing": "/api/dynamic-pricing",
             "bookings": "/api/bookings",
             "room_stats": "/api/room-stats",
-            "next_available_dates": "/api/next-available-dates"
+            "next_available_dates": "/api/next-available-dates",
+            "daily_analytics": "/api/analytics/daily",
+            "training_export": "/api/training/export",
+            "flexible_search": "/api/flexible-search",
+            "live_updates": "/api/live",
+            "metrics": "/api/metrics"
         },
         "documentation": "/docs",  # FastAPI auto-generated Swagger docs
         "status": "online"
@@ -256,145 +567,90 @@ async def root():
 
 @app.get("/api/rooms", response_model=List[dict])
 async def get_rooms(
+    request: Request,
     check_in: str = None,
     check_out: str = None,
     location: str = None,
-    db=Depends(get_db)
+    db=Depends(get_read_db),
+    session=Depends(get_read_session)
 ):
     """Get all rooms with dynamic availability based on date range and location"""
     try:
-        # First check if rooms exist
-        rooms = await db.rooms.find().to_list(length=None)
+        # Validate dates
+        if check_in and check_out:
+            try:
+                check_in_date = datetime.strptime(check_in, '%Y-%m-%d')
+                check_out_date = datetime.strptime(check_out, '%Y-%m-%d')
+            except ValueError:
+                raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
+            if check_in_date >= check_out_date:
+                raise HTTPException(status_code=400, detail="Check-out date must be after check-in date")
+            if (check_out_date - check_in_date).days > 30:
+                raise HTTPException(status_code=400, detail="Date range too large. Maximum is 30 days.")
         
-        # Initialize rooms if none exist
-        if not rooms:
-            locations = ["Madurai", "Hyderabad", "Bangalore"]
-            default_rooms = []
-            
-            base_rooms = [
-                {
-                    "room_id": 1,  # Standard Single
-                    "type": "Standard Single",
-                    "base_price": 2499,
-                    "total_rooms": 5,
-                    "description": "Cozy room with a single bed, perfect for solo travelers.",
-                    "amenities": ["Free Wi-Fi", "TV", "Air Conditioning", "Work Desk", "Daily Housekeeping"],
-                    "capacity": 1,
-                    "image_url": "https://images.unsplash.com/photo-1566665797739-1674de7a421a?ixlib=rb-4.0.3"
-                },
-                {
-                    "room_id": 2,  # Standard Double
-                    "type": "Standard Double",
-                    "base_price": 3999,
-                    "total_rooms": 8,
-                    "description": "Comfortable room with a queen-size bed, ideal for couples.",
-                    "amenities": ["Free Wi-Fi", "TV", "Air Conditioning", "Mini Fridge", "Coffee Maker", "Work Desk", "Daily Housekeeping"],
-                    "capacity": 2,
-                    "image_url": "https://images.unsplash.com/photo-1590490360182-c33d57733427?ixlib=rb-4.0.3"
-                },
-                {
-                    "room_id": 3,  # Deluxe
-                    "type": "Deluxe",
-                    "base_price": 5599,
-                    "total_rooms": 4,
-                    "description": "Spacious deluxe room with premium amenities and city views.",
-                    "amenities": ["Free Wi-Fi", "Large TV", "Air Conditioning", "Mini Fridge", "Coffee Maker", "Room Service", "City View", "Premium Toiletries"],
-                    "capacity": 2,
-                    "image_url": "https://images.unsplash.com/photo-1578683010236-d716f9a3f461?ixlib=rb-4.0.3"
-                },
-                {
-                    "room_id": 4,  # Suite
-                    "type": "Suite",
-                    "base_price": 7499,
-                    "total_rooms": 2,
-                    "description": "Luxurious suite with separate living area and premium amenities.",
-                    "amenities": ["Free Wi-Fi", "Large TV", "Air Conditioning", "Mini Bar", "Room Service", "Jacuzzi", "City View", "Premium Toiletries", "Separate Living Area"],
-                    "capacity": 3,
-                    "image_url": "https://images.unsplash.com/photo-1582719478250-c89cae4dc85b?ixlib=rb-4.0.3"
-                },
-                {
-                    "room_id": 5,  # Presidential Suite
-                    "type": "Presidential Suite",
-                    "base_price": 14599,
-                    "total_rooms": 1,
-                    "description": "Our most exclusive accommodation with panoramic views and luxury amenities.",
-                    "amenities": ["Free Wi-Fi", "Large TV", "Air Conditioning", "Full Bar", "24/7 Room Service", "Jacuzzi", "Private Balcony", "Panoramic View", "Butler Service", "Private Dining"],
-                    "capacity": 4,
-                    "image_url": "https://images.unsplash.com/photo-1631049307264-da0ec9d70304?ixlib=rb-4.0.3"
-                }
-            ]
-            
-            # Create room entries for each location
-            for location in locations:
-                for room in base_rooms:
-                    room_with_location = {
-                        **room,  # Spread the base room properties
-                        "location": location  # Add location
-                    }
-                    default_rooms.append(room_with_location)
-            
-            # Insert the default rooms
-            await db.rooms.insert_many(default_rooms)
-            rooms = default_rooms
-
-        # Apply location filter only if location is provided and not empty
-        if location and location.strip():
-            rooms = [room for room in rooms if room.get('location') == location]
+        # The response only changes with the catalog and the query, so answer
+        # repeat requests with 304 before loading anything
+        etag = make_etag("rooms", await get_catalog_version(db, normalize_location(location), session), check_in, check_out, location)
+        matched_etag = etag_matches(request, etag)
+        if matched_etag:
+            return not_modified_response(matched_etag)
+        
+        location = normalize_location(location)
+        
+        # Only load the requested property's rooms
+        room_query = {"location": location} if location else {}
+        rooms = await db.rooms.find(room_query, session=session).to_list(length=None)
+        
+        # Initialize rooms for this location (or any location) that has none;
+        # read them back from the primary, which has the new rooms
+        if unseeded_locations(rooms, location):
+            await ensure_rooms_seeded(primary(db), location)
+            rooms = await primary(db).rooms.find(room_query).to_list(length=None)
 
         # If date range is provided, calculate availability
         if check_in and check_out:
-            booking_query = {
-                "$and": [
-                    {
-                        "$or": [
-                            {
-                                "check_in": {"$lte": check_out},
-                                "check_out": {"$gte": check_in}
-                            }
-                        ]
-                    }
-                ]
-            }
+            # Bookings holding at least one night of the stay
+            booking_query = {"check_in": {"$lt": check_out}, "check_out": {"$gt": check_in}}
             
             # Add location filter to booking query only if location is provided and not empty
-            if location and location.strip():
-                booking_query["$and"].append({"location": location})
+            if location:
+                booking_query["location"] = location
 
-            bookings = await db.bookings.find(booking_query).to_list(length=None)
+            bookings = await db.bookings.find(booking_query, session=session).to_list(length=None)
 
-            # Calculate availability for each room
-            for room in rooms:
-                total_rooms = room.get('total_rooms', 0)
-                # Count bookings for this room type in the date range for this location
-                occupied = sum(1 for booking in bookings 
-                             if booking['room_id'] == room['room_id'] 
-                             and booking['location'] == room['location'])
-                room['available'] = total_rooms - occupied
-                room['occupied_count'] = occupied
+            # Calculate availability for each room from its busiest night,
+            # with the same rule as flexible search
+            for room, occupied in zip(rooms, stay_occupancy(rooms, bookings, check_in, check_out)):
+                room['available'] = room.get('total_rooms', 0) - int(occupied)
+                room['occupied_count'] = int(occupied)
         else:
             # Without date range, show total capacity
             for room in rooms:
                 room['available'] = room.get('total_rooms', 0)
                 room['occupied_count'] = 0
 
-        # Convert ObjectId to string
-        for room in rooms:
-            if "_id" in room:
-                room["_id"] = str(room["_id"])
-        
-        return rooms
+        # ObjectIds are converted by the response encoder
+        return cached_json_response(request, etag, rooms)
+    except HTTPException as he:
+        raise he
     except Exception as e:
-        print(f"Error in get_rooms: {str(e)}")  # Add logging
+        logger.exception("Error in get_rooms")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/dynamic-pricing", response_model=List[RoomPricing])
 async def get_dynamic_pricing(
+    request: Request,
     check_in: str = Query(..., description="Check-in date (YYYY-MM-DD)"),
     check_out: str = Query(..., description="Check-out date (YYYY-MM-DD)"),
-    db=Depends(get_db)
+    location: str = Query(None, description="Price only this location's rooms"),
+    precise: bool = Query(False, description="Score with the full forest instead of the fast tier"),
+    db=Depends(get_read_db),
+    session=Depends(get_read_session)
 ):
     """Dynamic pricing endpoint using Random Forest model for prediction with holiday relevance."""
     try:
+        location = normalize_location(location)
+        
         # Validate dates
         try:
             check_in_date = datetime.strptime(check_in, '%Y-%m-%d')
@@ -411,143 +667,169 @@ async def get_dynamic_pricing(
             holidays = await get_holidays(check_in, check_out)
         except Exception as e:
             holidays = {}
+        stay_calendar.mark_holidays(holidays)
+        
+        # Prices depend only on the catalog, the stay and its holidays
+        etag = make_etag(
+            "pricing", await get_catalog_version(db, location, session), location, check_in, check_out,
+            sorted(holidays), "random_forest" if precise else hot_path_model, model_batcher is not None
+        )
+        matched_etag = etag_matches(request, etag)
+        if matched_etag:
+            return not_modified_response(matched_etag)
             
         try:
-            occupancy_rate = await calculate_occupancy_rate(db, check_in, check_out)
+            occupancy_rate = await calculate_occupancy_rate(db, check_in, check_out, location, session)
         except Exception as e:
             occupancy_rate = 0.6
         
-        # Get rooms from database
-        rooms = await db.rooms.find().to_list(length=None)
+        # Get rooms from database, scoped to the requested location
+        rooms = await db.rooms.find({"location": location} if location else {}, session=session).to_list(length=None)
         if not rooms:
             raise HTTPException(status_code=404, detail="No rooms found in database")
         
-        result = []
-        
-        for room in rooms:
-            try:
-                room_id = room["room_id"]
-                base_price = room["base_price"]
-                
-                # Calculate features for the model
-                check_in_obj = datetime.strptime(check_in, '%Y-%m-%d')
-                check_out_obj = datetime.strptime(check_out, '%Y-%m-%d')
-                
-                # Calculate number of nights
-                total_nights = (check_out_obj - check_in_obj).days
-                
-                # Calculate weekend and week nights
-                weekend_nights = 0
-                week_nights = 0
-                current_date = check_in_obj
-                
-                while current_date < check_out_obj:
-                    if current_date.weekday() >= 5:  # Saturday (5) or Sunday (6)
-                        weekend_nights += 1
-                    else:
-                        week_nights += 1
-                    current_date += timedelta(days=1)
-                
-                # Check if any date in the range is a holiday
-                is_holiday = 0
-                current_date = check_in_obj
-                while current_date < check_out_obj:
-                    date_str = current_date.strftime('%Y-%m-%d')
-                    if date_str in holidays:
-                        is_holiday = 1
-                        break
-                    current_date += timedelta(days=1)
-                
-                # Prepare the feature vector for the Random Forest model
-                # Note: room_id is used as room_type (0-4)
-                features = pd.DataFrame({
-                    'year': [check_in_obj.year],
-                    'day': [check_in_obj.day],
-                    'month': [check_in_obj.month],
-                    'weekend_nights': [weekend_nights],
-                    'week_nights': [week_nights],
-                    'room_type': [room_id - 1],
-                    'is_Holiday': [is_holiday]
-                })
-                
-                # If model loaded correctly, use it. Otherwise, fallback to rule-based pricing.
-                if rf_model is not None:
-                    try:
-                        predicted_price = rf_model.predict(features)[0]
-                        final_price = fancy_round(predicted_price)
-                        factors = {
-                            "model": "random_forest",
-                            "year": check_in_obj.year,
-                            "month": check_in_obj.month,
-                            "weekend_nights": weekend_nights,
-                            "week_nights": week_nights,
-                            "room_type": room_id - 1,
-                            "is_holiday": bool(is_holiday)
-                        }
-                    except Exception as e:
-                        # Fallback to rule-based pricing
-                        final_price = base_price
-                        factors = {"model": "fallback", "error": str(e)}
-                else:
-                    # Fallback rule-based pricing logic
-                    final_price = base_price
-                    factors = {"model": "fallback"}
-                    if is_holiday:
-                        final_price *= PRICING_FACTORS["holiday_multiplier"]
-                        factors["holiday"] = PRICING_FACTORS["holiday_multiplier"]
-                    elif weekend_nights > 0:
-                        final_price *= PRICING_FACTORS["weekend_multiplier"]
-                        factors["weekend"] = PRICING_FACTORS["weekend_multiplier"]
-                    else:
-                        if occupancy_rate < 0.5:
-                            final_price *= PRICING_FACTORS["low_occupancy_discount"]
-                            factors["low_occupancy"] = PRICING_FACTORS["low_occupancy_discount"]
-                        elif occupancy_rate > 0.8:
-                            final_price *= PRICING_FACTORS["high_occupancy_premium"]
-                            factors["high_occupancy"] = PRICING_FACTORS["high_occupancy_premium"]
-                    final_price = fancy_round(final_price)
-                
-                result.append(RoomPricing(
-                    room_id=room_id,
-                    price=final_price,
-                    base_price=base_price,
-                    price_factors=factors
-                ))
-            except Exception as e:
-                continue  # Skip this room and continue with others
+        result = await price_rooms(rooms, check_in, check_out, occupancy_rate, precise)
         
         if not result:
             raise HTTPException(status_code=500, detail="No valid room prices could be calculated")
+        
+        # Base prices returned because the model failed must not be cached
+        # under the ETag of the model's prices
+        if any(price.price_factors.error for price in result):
+            etag = None
             
-        return result
+        return cached_json_response(request, etag, result)
     
     except HTTPException as he:
         raise he
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error calculating dynamic prices: {str(e)}")
 
+@app.get("/api/flexible-search", response_model=List[dict])
+async def flexible_search(
+    nights: int = Query(..., ge=1, le=30, description="Length of stay in nights"),
+    start: str = Query(..., description="Earliest check-in date (YYYY-MM-DD)"),
+    end: str = Query(..., description="Latest check-out date (YYYY-MM-DD)"),
+    location: str = Query(..., description="Location to search"),
+    room_id: Optional[int] = Query(None, description="Only search this room type"),
+    top_k: int = Query(5, ge=1, le=50, description="Number of stays to return"),
+    db=Depends(get_db)
+):
+    """Find the cheapest available stays of a given length within a date window"""
+    try:
+        # Validate dates
+        try:
+            start_date = datetime.strptime(start, '%Y-%m-%d')
+            end_date = datetime.strptime(end, '%Y-%m-%d')
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
+        if (end_date - start_date).days < nights:
+            raise HTTPException(status_code=400, detail="Date window is shorter than the stay")
+        if (end_date - start_date).days > 180:
+            raise HTTPException(status_code=400, detail="Date window too large. Maximum is 180 days.")
+        
+        location = normalize_location(location)
+        room_query = {"location": location}
+        if room_id is not None:
+            room_query["room_id"] = room_id
+        rooms = await db.rooms.find(room_query).to_list(length=None)
+        if not rooms:
+            raise HTTPException(status_code=404, detail="No rooms found for this location")
+        
+        # One query for every booking touching the window
+        booking_query = {"location": location, "check_in": {"$lt": end}, "check_out": {"$gt": start}}
+        if room_id is not None:
+            booking_query["room_id"] = room_id
+        bookings = await db.bookings.find(booking_query).to_list(length=None)
+        
+        try:
+            holidays = await get_holidays(start, end)
+        except Exception as e:
+            holidays = {}
+        stay_calendar.mark_holidays(holidays)
+        
+        # Availability for every candidate stay from per-night occupancy arrays
+        room_index, check_ins, rooms_left = candidate_windows(rooms, bookings, start, end, nights)
+        if len(check_ins) == 0:
+            return FastJSONResponse([])
+        
+        # Score every candidate in one batch
+        # Note: room_id is used as room_type (0-4)
+        room_types = np.array([room["room_id"] - 1 for room in rooms])[room_index]
+        model = "fallback"
+        prices = None
+        if model_batcher is not None:
+            try:
+                features = stay_calendar.feature_frame(check_ins, check_ins + nights, room_types)
+                prices = np.asarray(await model_batcher.predict(features), dtype=float)
+                model = hot_path_model
+            except HTTPException:
+                raise
+            except Exception as e:
+                prices = None
+        if prices is None:
+            # Occupancy is location-wide, as in the pricing endpoint, so use
+            # every room type and booking rather than only the searched ones
+            first_ordinal = to_ordinal(start)
+            total_rooms = await db.rooms.count_documents({"location": location})
+            location_bookings = await db.bookings.find(
+                {"location": location, "check_in": {"$lte": end}, "check_out": {"$gte": start}}
+            ).to_list(length=None)
+            daily_rates = daily_occupancy_rates(location_bookings, total_rooms, first_ordinal, to_ordinal(end) - first_ordinal)
+            occupancy_rates = stay_occupancy_rates(daily_rates, first_ordinal, check_ins, nights)
+            base_prices = np.array([room["base_price"] for room in rooms], dtype=float)[room_index]
+            prices = fallback_prices(base_prices, check_ins, nights, occupancy_rates, PRICING_FACTORS)
+        
+        price_per_night = fancy_round_array(prices)
+        total_prices = price_per_night * nights
+        
+        result = []
+        for i in cheapest_windows(total_prices, top_k):
+            room = rooms[room_index[i]]
+            check_in_ordinal = int(check_ins[i])
+            result.append(StayOption(
+                room_id=room["room_id"],
+                type=room.get("type"),
+                location=room.get("location"),
+                check_in=date.fromordinal(check_in_ordinal).isoformat(),
+                check_out=date.fromordinal(check_in_ordinal + nights).isoformat(),
+                nights=nights,
+                price_per_night=float(price_per_night[i]),
+                total_price=float(total_prices[i]),
+                rooms_left=int(rooms_left[i]),
+                model=model
+            ))
+        return FastJSONResponse(result)
+    except HTTPException as he:
+        raise he
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error searching flexible dates: {str(e)}")
+
 @app.get("/api/room-stats")
-async def get_room_stats(db=Depends(get_db)):
+async def get_room_stats(location: str = None, db=Depends(get_db)):
     """Get current room statistics"""
     try:
+        location = normalize_location(location)
+        room_query = {"location": location} if location else {}
+        
         # Get all rooms
-        rooms = await db.rooms.find().to_list(length=None)
+        rooms = await db.rooms.find(room_query).to_list(length=None)
         
-        if not rooms:
-            # If no rooms exist, initialize them first
-            await get_rooms(db)
-            rooms = await db.rooms.find().to_list(length=None)
+        if unseeded_locations(rooms, location):
+            # Initialize rooms for any location that has none first
+            await ensure_rooms_seeded(db, location)
+            rooms = await db.rooms.find(room_query).to_list(length=None)
         
         # Calculate statistics
         total_rooms = sum(room["available"] + room["occupied_count"] for room in rooms)
         occupied_rooms = sum(room["occupied_count"] for room in rooms)
         occupancy_rate = round((occupied_rooms / total_rooms) * 100) if total_rooms > 0 else 0
         
-        return {
-            "totalRooms": total_rooms,
-            "occupiedRooms": occupied_rooms,
-            "occupancyRate": occupancy_rate
-        }
+        return FastJSONResponse(RoomStats(
+            totalRooms=total_rooms,
+            occupiedRooms=occupied_rooms,
+            occupancyRate=occupancy_rate
+        ))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -567,8 +849,12 @@ async def create_booking(booking: Booking, db=Depends(get_db)):
     try:
         booking_data = booking.dict()
         
-        # Get the room details
-        room = await db.rooms.find_one({"room_id": booking_data["room_id"]})
+        # Get the room details from the booked location; db reads from the
+        # primary so the checks below never see a stale catalog
+        room_query = {"room_id": booking_data["room_id"]}
+        if normalize_location(booking_data.get("location")):
+            room_query["location"] = normalize_location(booking_data["location"])
+        room = await db.rooms.find_one(room_query)
         if not room:
             raise HTTPException(status_code=404, detail="Room not found")
 
@@ -597,36 +883,172 @@ async def create_booking(booking: Booking, db=Depends(get_db)):
         booking_data["location"] = room["location"]
         
         result = await db.bookings.insert_one(booking_data)
+        await bump_catalog_version(db, "bookings_version", booking_data["location"])
+        try:
+            await record_booking(db, booking_data)
+        except Exception as e:
+            # The booking is already stored; a rollup rebuild will pick it up
+            logger.exception("Error updating daily rollups", extra={"booking_id": str(result.inserted_id)})
+        
+        # Push the inventory change to live subscribers without delaying the response
+        live_updates.spawn(publish_inventory_change(db, booking_data, room))
         
         if booking_data.get("guest_details", {}).get("email"):
             await send_booking_confirmation_email(booking_data, room)
         
-        return {"message": "Booking created successfully", "booking_id": str(result.inserted_id)}
+        return FastJSONResponse(BookingCreated(message="Booking created successfully", booking_id=str(result.inserted_id)))
     except HTTPException as he:
         raise he
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+async def publish_inventory_change(db, booking_data, room):
+    """Send availability and price deltas for a booked room to live subscribers"""
+    try:
+        location = booking_data["location"]
+        ranges = live_updates.ranges_for(location, booking_data["check_in"], booking_data["check_out"])
+        if not ranges:
+            return
+        
+        # Load the room's bookings once over every subscribed range and
+        # slice the nightly occupancy per range
+        first = min(check_in for check_in, _ in ranges)
+        last = max(check_out for _, check_out in ranges)
+        first_ordinal = to_ordinal(first)
+        days = to_ordinal(last) - first_ordinal
+        bookings = await db.bookings.find({
+            "location": location,
+            "room_id": room["room_id"],
+            "check_in": {"$lt": last},
+            "check_out": {"$gt": first}
+        }).to_list(length=None)
+        occupancy = nightly_occupancy(bookings, [room_key(room)], first_ordinal, days)[0]
+        
+        # Occupancy rates only affect the rule-based fallback prices
+        occupancy_rates = [0.6] * len(ranges)
+        if model_batcher is None:
+            total_rooms = await db.rooms.count_documents({"location": location})
+            if total_rooms:
+                location_bookings = await db.bookings.find(
+                    {"location": location, "check_in": {"$lte": last}, "check_out": {"$gte": first}}
+                ).to_list(length=None)
+                daily_rates = daily_occupancy_rates(location_bookings, total_rooms, first_ordinal, days)
+                occupancy_rates = [
+                    float(daily_rates[to_ordinal(check_in) - first_ordinal:to_ordinal(check_out) - first_ordinal].mean())
+                    for check_in, check_out in ranges
+                ]
+        
+        # Price every range at once; the batcher merges them into one model call
+        range_prices = await asyncio.gather(*(
+            price_rooms([room], check_in, check_out, occupancy_rate)
+            for (check_in, check_out), occupancy_rate in zip(ranges, occupancy_rates)
+        ))
+        
+        for (check_in, check_out), prices in zip(ranges, range_prices):
+            occupied = int(occupancy[to_ordinal(check_in) - first_ordinal:to_ordinal(check_out) - first_ordinal].max())
+            live_updates.publish(location, check_in, check_out, "inventory", {
+                "room_id": room["room_id"],
+                "location": location,
+                "check_in": check_in,
+                "check_out": check_out,
+                "available": room.get("total_rooms", 0) - occupied,
+                "occupied_count": occupied,
+                "price": prices[0] if prices else None
+            })
+    except Exception as e:
+        logger.exception("Error publishing live update")
+
+@app.get("/api/live")
+async def live_inventory(
+    location: str = Query(..., description="Location to watch"),
+    check_in: str = Query(..., description="Check-in date (YYYY-MM-DD)"),
+    check_out: str = Query(..., description="Check-out date (YYYY-MM-DD)")
+):
+    """Server-sent events stream of availability and price changes for a location and dates"""
+    try:
+        check_in_date = datetime.strptime(check_in, '%Y-%m-%d')
+        check_out_date = datetime.strptime(check_out, '%Y-%m-%d')
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
+    if check_in_date >= check_out_date:
+        raise HTTPException(status_code=400, detail="Check-out date must be after check-in date")
+    if (check_out_date - check_in_date).days > 30:
+        raise HTTPException(status_code=400, detail="Date range too large. Maximum is 30 days.")
+    location = normalize_location(location)
+    if not location:
+        raise HTTPException(status_code=400, detail="Location is required")
+    if live_updates.subscriber_count >= LIVE_MAX_SUBSCRIBERS:
+        raise HTTPException(status_code=503, detail="Too many live subscribers", headers={"Retry-After": "30"})
+    
+    # Pushed prices need the stay's holidays in the calendar index, which
+    # may not hold them yet on this worker (e.g. after a restart)
+    await get_holidays(check_in, check_out)
+    return StreamingResponse(
+        event_stream(live_updates, location, check_in, check_out),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @app.get("/api/bookings", response_model=List[dict])
-async def get_bookings(db=Depends(get_db)):
+async def get_bookings(location: str = None, db=Depends(get_read_db)):
     """Get all bookings (admin endpoint)"""
-    bookings = await db.bookings.find().to_list(length=None)
-    return bookings
+    location = normalize_location(location)
+    bookings = await db.bookings.find({"location": location} if location else {}).to_list(length=None)
+    return FastJSONResponse(bookings)
+
+@app.get("/api/analytics/daily")
+async def get_daily_analytics(
+    start: str = Query(..., description="First date (YYYY-MM-DD)"),
+    end: str = Query(..., description="Last date (YYYY-MM-DD)"),
+    location: str = None,
+    room_id: Optional[int] = None,
+    db=Depends(get_db)
+):
+    """Daily nights sold, revenue and average rate per location and room (admin endpoint)"""
+    try:
+        if datetime.strptime(start, '%Y-%m-%d') > datetime.strptime(end, '%Y-%m-%d'):
+            raise HTTPException(status_code=400, detail="End date must not be before start date")
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
+    
+    rows = await query_rollups(db, start, end, normalize_location(location), room_id)
+    return FastJSONResponse(rows)
+
+@app.post("/api/analytics/rebuild")
+async def rebuild_daily_analytics(location: str = None, db=Depends(get_db)):
+    """Rebuild the daily rollups from all bookings (admin endpoint)"""
+    try:
+        rollups = await rebuild_rollups(db, normalize_location(location))
+        return {"message": "Rollups rebuilt", "rollups": rollups}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/training/export")
+async def export_training_data(db=Depends(get_db)):
+    """Append bookings made since the last export to the Parquet training dataset (admin endpoint)"""
+    try:
+        export = await export_new_bookings(db, thread_pool, fetch_holidays)
+        return {"message": "Bookings exported", **export}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/next-available-dates")
-async def get_next_available_dates(db=Depends(get_db)):
+async def get_next_available_dates(location: str = None, db=Depends(get_read_db)):
     """Get next available dates for rooms that are currently sold out"""
     try:
+        location = normalize_location(location)
+        location_filter = {"location": location} if location else {}
+        
         # Get all rooms
-        rooms = await db.rooms.find().to_list(length=None)
+        rooms = await db.rooms.find(location_filter).to_list(length=None)
         
-        if not rooms:
-            # Initialize rooms if none exist
-            await get_rooms(db)
-            rooms = await db.rooms.find().to_list(length=None)
+        if unseeded_locations(rooms, location):
+            # Initialize rooms for any location that has none
+            await ensure_rooms_seeded(primary(db), location)
+            rooms = await primary(db).rooms.find(location_filter).to_list(length=None)
         
         # Get all current bookings
-        bookings = await db.bookings.find().to_list(length=None)
+        bookings = await db.bookings.find(location_filter).to_list(length=None)
         
         next_available_dates = {}
         
@@ -653,17 +1075,31 @@ async def get_next_available_dates(db=Depends(get_db)):
                 next_available = latest_checkout + timedelta(days=1)
                 next_available_dates[room_id] = next_available.strftime('%Y-%m-%d')
         
-        return next_available_dates
+        return FastJSONResponse(next_available_dates)
     except Exception as e:
-        print(f"Error in get_next_available_dates: {str(e)}")  # Add logging
+        logger.exception("Error in get_next_available_dates")
         return {}  # Return empty dict instead of raising error
 
+@app.get("/api/metrics")
+async def get_metrics():
+    """Model serving and execution layer metrics"""
+    return {
+        "model_tier": hot_path_model if model_batcher is not None else None,
+        "model_batching": model_batcher.metrics() if model_batcher is not None else None,
+        "precise_model_batching": precise_batcher.metrics() if fast_model is not None else None,
+        "thread_pool": thread_pool.metrics(),
+        "event_loop_lag": event_loop_lag.metrics(),
+        "admission_control": admission_controller.metrics(),
+        "live_updates": live_updates.metrics(),
+        "logging": logging_system.metrics()
+    }
+
 @app.get("/api/test-holidays")
 async def test_holidays():
     """Test endpoint to check if Google Calendar API is working with Tamil holidays"""
     try:
         # Test with Pongal 2024 date range
-        holidays = await get_holidays('2024-01-14', '2024-01-17')
+        holidays = await fetch_holidays('2024-01-14', '2024-01-17')
         
         # Add more detailed response
         return {
@@ -683,6 +1119,14 @@ async def test_holidays():
             "message": "Failed to fetch Tamil holidays"
         }
 
+def send_email_message(smtp_email, smtp_password, msg):
+    """Create SMTP session and send email"""
+    server = smtplib.SMTP('smtp.gmail.com', 587)
+    server.starttls()
+    server.login(smtp_email, smtp_password)
+    server.send_message(msg)
+    server.quit()
+
 # Add this function to send emails
 async def send_booking_confirmation_email(booking_data, room_details):
     """Send booking confirmation email to guest"""
@@ -698,267 +1142,18 @@ async def send_booking_confirmation_email(booking_data, room_details):
         msg['To'] = booking_data['guest_details']['email']
         msg['Subject'] = f'Booking Confirmation - {room_details["type"]}'
 
-        # HTML email template with modern design
-        html = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <meta charset="UTF-8">
-            <meta name="viewport" content="width=device-width, initial-scale=1.0">
-            <style>
-                @import url('https://fonts.googleapis.com/css2?family=Inter:wght@400;600&display=swap');
-                body {{
-                    font-family: 'Inter', sans-serif;
-                    line-height: 1.6;
-                    margin: 0;
-                    padding: 0;
-                    background-color: #f4f4f5;
-                }}
-                .container {{
-                    max-width: 600px;
-                    margin: 20px auto;
-                    background: white;
-                    border-radius: 12px;
-                    overflow: hidden;
-                    box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
-                }}
-                .header {{
-                    background: linear-gradient(135deg, #1e40af, #3b82f6);
-                    color: white;
-                    padding: 40px 20px;
-                    text-align: center;
-                }}
-                .content {{
-                    padding: 30px;
-                }}
-                .booking-id {{
-                    background: rgba(255, 255, 255, 0.1);
-                    padding: 8px 15px;
-                    border-radius: 20px;
-                    font-size: 14px;
-                    margin-top: 10px;
-                    display: inline-block;
-                }}
-                .section {{
-                    margin: 25px 0;
-                    padding: 20px;
-                    background: #f8fafc;
-                    border-radius: 8px;
-                }}
-                .section-title {{
-                    color: #1e40af;
-                    font-size: 18px;
-                    font-weight: 600;
-                    margin-bottom: 15px;
-                    display: flex;
-                    align-items: center;
-                    gap: 8px;
-                }}
-                .detail-row {{
-                    display: flex;
-                    justify-content: space-between;
-                    margin: 8px 0;
-                    font-size: 15px;
-                }}
-                .label {{
-                    color: #64748b;
-                }}
-                .value {{
-                    color: #0f172a;
-                    font-weight: 600;
-                }}
-                .important-info {{
-                    background: #fef3c7;
-                    padding: 15px;
-                    border-radius: 8px;
-                    margin: 20px 0;
-                }}
-                .footer {{
-                    text-align: center;
-                    padding: 20px;
-                    background: #f8fafc;
-                    color: #64748b;
-                    font-size: 14px;
-                }}
-                .button {{
-                    display: inline-block;
-                    padding: 12px 24px;
-                    background: #2563eb;
-                    color: white;
-                    text-decoration: none;
-                    border-radius: 6px;
-                    font-weight: 600;
-                    margin: 20px 0;
-                }}
-                .amenities-grid {{
-                    display: grid;
-                    grid-template-columns: repeat(2, 1fr);
-                    gap: 12px;
-                    margin-top: 15px;
-                }}
-                .amenity {{
-                    display: flex;
-                    align-items: center;
-                    background: #f0f9ff;
-                    color: #0369a1;
-                    padding: 8px 12px;
-                    border-radius: 8px;
-                    font-size: 13px;
-                    gap: 8px;
-                }}
-                .amenity-icon {{
-                    color: #0ea5e9;
-                    font-size: 16px;
-                }}
-                .contact-section {{
-                    text-align: center;
-                    padding: 24px;
-                    background: #f8fafc;
-                    border-radius: 8px;
-                    margin: 20px 0;
-                }}
-                .contact-section .section-title {{
-                    display: flex;
-                    justify-content: center;
-                    align-items: center;
-                    margin-bottom: 20px;
-                    text-align: center;
-                    width: 100%;
-                }}
-                .contact-section .section-title span {{
-                    display: inline-block;
-                    text-align: center;
-                }}
-                .contact-info {{
-                    font-size: 15px;
-                    line-height: 1.8;
-                    color: #334155;
-                    text-align: center;
-                }}
-            </style>
-        </head>
-        <body>
-            <div class="container">
-                <div class="header">
-                    <h1>Booking Confirmed! 🎉</h1>
-                    <div class="booking-id">Booking ID: #{str(booking_data.get('_id', 'TMP-' + datetime.now().strftime('%Y%m%d')))}</div>
-                </div>
-                
-                <div class="content">
-                    <p>Dear {booking_data['guest_name']},</p>
-                    <p>Thank you for choosing Luxe Resorts. Your reservation has been successfully confirmed.</p>
-                    
-                    <div class="section">
-                        <div class="section-title">
-                            <span>🏨 Room Details</span>
-                        </div>
-                        <div class="detail-row">
-                            <span class="label">Room Type : </span>
-                            <span class="value"> {room_details['type']}</span>
-                        </div>
-                        <div class="detail-row">
-                            <span class="label">Number of Guests : </span>
-                            <span class="value"> {booking_data['guests']} Guest(s)</span>
-                        </div>
-                        <div class="amenities-grid">
-                            {' '.join(f'''
-                                <div class="amenity">
-                                    <span class="amenity-icon">✦ </span>
-                                     {amenity}
-                                </div>
-                            ''' for amenity in room_details.get('amenities', []))}
-                        </div>
-                    </div>
-
-                    <div class="section">
-                        <div class="section-title">
-                            <span>📅 Stay Duration</span>
-                        </div>
-                        <div class="detail-row">
-                            <span class="label">Check-in : </span>
-                            <span class="value"> {booking_data['check_in']} (from 2:00 PM)</span>
-                        </div>
-                        <div class="detail-row">
-                            <span class="label">Check-out : </span>
-                            <span class="value"> {booking_data['check_out']} (until 11:00 AM)</span>
-                        </div>
-                    </div>
-
-                    <div class="section">
-                        <div class="section-title">
-                            <span>💰 Payment Details</span>
-                        </div>
-                        <div class="detail-row">
-                            <span class="label">Price per Night : </span>
-                            <span class="value"> ₹{booking_data['price_per_night']:,.2f}</span>
-                        </div>
-                        <div class="detail-row">
-                            <span class="label">Total Amount : </span>
-                            <span class="value"> ₹{booking_data['total_price']:,.2f}</span>
-                        </div>
-                    </div>
-
-                    <div class="important-info">
-                        <div class="section-title">
-                            <span>ℹ️ Important Information</span>
-                        </div>
-                        <ul style="margin: 0; padding-left: 20px;">
-                            <li>Please present a valid ID and the credit card used for booking during check-in</li>
-                            <li>Early check-in and late check-out are subject to availability</li>
-                            <li>Free cancellation available up to 24 hours before check-in</li>
-                            <li>Free WiFi available throughout the property</li>
-                        </ul>
-                    </div>
-
-                    <div style="text-align: center;">
-                        <a href="#" class="button" style="text-decoration: none; color: white;">View or Modify Booking</a>
-                    </div>
-
-                    <div class="contact-section">
-                        <div class="section-title" style="text-align: center; width: 100%;">
-                            <span style="margin: 0 auto;">📍 Contact Information</span>
-                        </div>
-                        <div class="contact-info">
-                            <strong>Hotel Dynamic Pricing</strong><br>
-                            123 Hotel Street<br>
-                            City Name, State 600001<br>
-                            <br>
-                            📞 <a href="tel:+911234567890" style="color: #2563eb; text-decoration: none;">+91 1234567890</a><br>
-                            ✉️ <a href="mailto:support@hotel.com" style="color: #2563eb; text-decoration: none;">support@hotel.com</a>
-                        </div>
-                    </div>
-                </div>
-
-                <div class="footer">
-                    <p>Need help? Contact our 24/7 customer support</p>
-                    <div style="margin-top: 15px;">
-                        <a href="#" style="color: #2563eb; margin: 0 10px;">Facebook</a>
-                        <a href="#" style="color: #2563eb; margin: 0 10px;">Twitter</a>
-                        <a href="#" style="color: #2563eb; margin: 0 10px;">Instagram</a>
-                    </div>
-                    <p style="margin-top: 20px; font-size: 12px;">
-                        This email was sent to {booking_data['guest_details']['email']}.<br>
-                        © 2024 Hotel Name. All rights reserved.
-                    </p>
-                </div>
-            </div>
-        </body>
-        </html>
-        """
+        # Rendering takes microseconds, less than handing it to a pool would
+        html = render_booking_confirmation_email(booking_data, room_details)
 
         # Attach both plain text and HTML versions
         msg.attach(MIMEText(html, 'html'))
 
-        # Create SMTP session and send email
-        server = smtplib.SMTP('smtp.gmail.com', 587)
-        server.starttls()
-        server.login(smtp_email, smtp_password)
-        server.send_message(msg)
-        server.quit()
+        # SMTP is blocking I/O, so send from the thread pool
+        await thread_pool.run(send_email_message, smtp_email, smtp_password, msg)
         
         return True
     except Exception as e:
-        print(f"Error sending email: {str(e)}")
+        logger.exception("Error sending email")
         return False
 
 @app.post("/api/test-email")
@@ -991,4 +1186,10 @@ async def test_email(email: str):
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    # log_config=None keeps uvicorn from reinstalling its console handlers
+    # over the queue-based logging configured above. Rate limits key on the
+    # client address, which is only the real one behind a trusted proxy
+    uvicorn.run(
+        app, host="0.0.0.0", port=8000, log_config=None,
+        proxy_headers=PROXY_HEADERS, forwarded_allow_ips=FORWARDED_ALLOW_IPS
+    )
\ No newline at end of file
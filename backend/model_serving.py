@@ -0,0 +1,106 @@
+import asyncio
+import os
+import time
+import pandas as pd
+
+# Micro-batching settings for model inference
+MODEL_BATCH_WINDOW_MS = float(os.getenv("MODEL_BATCH_WINDOW_MS", "5"))
+MODEL_MAX_BATCH_SIZE = int(os.getenv("MODEL_MAX_BATCH_SIZE", "256"))
+
+class ModelBatcher:
+    """Collect feature rows from concurrent requests and score them in one call.
+
+    Callers await predict() with their own feature frame. Rows are queued
+    until the batch window expires or the batch reaches max_batch_size,
+    then the whole batch is scored with a single model.predict() and each
+    caller's future is resolved with its slice of the predictions. When an
+    executor is given, predict() runs there instead of on the event loop.
+    """
+
+    def __init__(self, model, batch_window_ms=MODEL_BATCH_WINDOW_MS, max_batch_size=MODEL_MAX_BATCH_SIZE, executor=None):
+        self.model = model
+        self.executor = executor
+        self.batch_window = batch_window_ms / 1000
+        self.max_batch_size = max_batch_size
+        self._pending = []
+        self._pending_rows = 0
+        self._flush_handle = None
+        self._tasks = set()
+        # Metrics
+        self.batches = 0
+        self.rows = 0
+        self.requests = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    async def predict(self, features):
+        """Queue a feature frame and wait for its predictions"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((features, future, time.perf_counter()))
+        self._pending_rows += len(features)
+
+        if self._pending_rows >= self.max_batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.batch_window, self._flush)
+
+        return await future
+
+    def _flush(self):
+        """Hand every queued frame to a single scoring task"""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending = self._pending, []
+        self._pending_rows = 0
+        if not batch:
+            return
+
+        started = time.perf_counter()
+        self.requests += len(batch)
+        for _, _, queued_at in batch:
+            wait = started - queued_at
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+
+        task = asyncio.ensure_future(self._score(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _score(self, batch):
+        """Score a batch in one vectorized call and resolve each caller"""
+        try:
+            features = pd.concat([frame for frame, _, _ in batch], ignore_index=True)
+            if self.executor is not None:
+                predictions = await self.executor.run(self.model.predict, features)
+            else:
+                predictions = self.model.predict(features)
+        except Exception as e:
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        self.batches += 1
+        offset = 0
+        for frame, future, _ in batch:
+            size = len(frame)
+            self.rows += size
+            if not future.done():
+                future.set_result(predictions[offset:offset + size])
+            offset += size
+
+    def metrics(self):
+        """Batch fill and queue wait statistics"""
+        return {
+            "batch_window_ms": self.batch_window * 1000,
+            "max_batch_size": self.max_batch_size,
+            "batches": self.batches,
+            "requests": self.requests,
+            "rows": self.rows,
+            "avg_batch_size": self.rows / self.batches if self.batches else 0,
+            "avg_batch_fill": self.rows / (self.batches * self.max_batch_size) if self.batches else 0,
+            "avg_queue_wait_ms": (self.total_wait / self.requests) * 1000 if self.requests else 0,
+            "max_queue_wait_ms": self.max_wait * 1000,
+        }
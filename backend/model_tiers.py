@@ -0,0 +1,208 @@
+"""Smaller pricing model tiers distilled from rf_model.
+
+Usage:
+    python model_tiers.py [--data PATH] [--out DIR] [--target rf_model|adr] [--serving-size N]
+
+Trains every tier (by default on rf_model's own predictions, i.e.
+distillation), saves it to DIR/pricing_<tier>.pkl and prints a report
+comparing each tier's MAE (against the ADR target and against rf_model)
+with its per-row and batched inference latency and its pickled size.
+The report also scores each tier against rf_model on N random stays
+shaped like the ones the pricing endpoints serve.
+"""
+import argparse
+import os
+import pickle
+import time
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import GradientBoostingRegressor, RandomForestRegressor
+from sklearn.metrics import max_error, mean_absolute_error
+from sklearn.model_selection import train_test_split
+from sklearn.tree import DecisionTreeRegressor
+from calendar_index import FEATURE_COLUMNS, stay_calendar, to_ordinal
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_DATA_PATH = os.path.join(BACKEND_DIR, "..", "frontend", "updated_hotel_bookings_price_3.csv")
+FULL_MODEL_PATH = os.path.join(BACKEND_DIR, "random_forest_model_steve1.pkl")
+MODELS_DIR = os.path.join(BACKEND_DIR, "models")
+TARGET_COLUMN = "adr"
+
+# Stays the pricing endpoints score: check-ins over the dates guests book,
+# 1-7 nights, every room type (room_id - 1)
+SERVING_START = "2025-01-01"
+SERVING_END = "2026-12-31"
+SERVING_MAX_NIGHTS = 7
+SERVING_ROOM_TYPES = 5
+SERVING_SIZE = 5000
+
+class PriceTable:
+    """Closed-form lookup of the mean price for each combination of features.
+
+    The training target is a near-deterministic function of the calendar
+    and room type, so a table keyed on those features reproduces it. Night
+    counts are capped at 1 as in the training data, and unseen combinations
+    fall back to coarser keys. Keys are packed into integer codes and looked
+    up with a binary search, so single rows and large batches are both cheap.
+    """
+
+    LEVELS = [
+        ["day", "month", "weekend_nights", "week_nights", "room_type", "is_Holiday"],
+        ["month", "weekend_nights", "room_type", "is_Holiday"],
+        ["room_type"],
+    ]
+
+    def _columns(self, X):
+        columns = {column: np.asarray(X[column], dtype=np.int64) for column in self.LEVELS[0]}
+        columns["weekend_nights"] = np.minimum(columns["weekend_nights"], 1)
+        columns["week_nights"] = np.minimum(columns["week_nights"], 1)
+        return columns
+
+    def _codes(self, columns, level):
+        # Mixed-radix packing; values beyond the training range map to an unseen digit
+        codes = np.zeros(len(columns[level[0]]), dtype=np.int64)
+        for column in level:
+            radix = self.radix[column]
+            codes = codes * radix + np.clip(columns[column], 0, radix - 1)
+        return codes
+
+    def fit(self, X, y):
+        columns = self._columns(X)
+        target = np.asarray(y, dtype=float)
+        self.radix = {column: int(values.max()) + 2 for column, values in columns.items()}
+        self.tables = []
+        for level in self.LEVELS:
+            codes, inverse = np.unique(self._codes(columns, level), return_inverse=True)
+            means = np.bincount(inverse, weights=target) / np.bincount(inverse)
+            self.tables.append((codes, means))
+        self.default = float(target.mean())
+        return self
+
+    def predict(self, X):
+        columns = self._columns(X)
+        prices = np.full(len(columns["day"]), self.default)
+        found = np.zeros(len(prices), dtype=bool)
+        for level, (codes, means) in zip(self.LEVELS, self.tables):
+            lookup = self._codes(columns, level)
+            position = np.minimum(np.searchsorted(codes, lookup), len(codes) - 1)
+            hit = ~found & (codes[position] == lookup)
+            prices[hit] = means[position[hit]]
+            found |= hit
+            if found.all():
+                break
+        return prices
+
+# Candidate tiers, from most to least expressive
+TIERS = {
+    "shallow_forest": lambda: RandomForestRegressor(n_estimators=10, max_depth=12, random_state=42, n_jobs=1),
+    "single_tree": lambda: DecisionTreeRegressor(max_depth=14, random_state=42),
+    "boosted_stumps": lambda: GradientBoostingRegressor(n_estimators=300, max_depth=1, learning_rate=0.3, random_state=42),
+    "price_table": PriceTable,
+}
+
+def tier_path(tier, models_dir=MODELS_DIR):
+    return os.path.join(models_dir, f"pricing_{tier}.pkl")
+
+def load_model_tier(tier, models_dir=MODELS_DIR):
+    """Load a trained tier; returns None if it has not been trained"""
+    path = tier_path(tier, models_dir)
+    if not os.path.exists(path):
+        return None
+    return joblib.load(path)
+
+def load_training_data(data_path=DEFAULT_DATA_PATH):
+    """Same features and split as the notebook that trained rf_model"""
+    data = pd.read_csv(data_path)
+    X = data[FEATURE_COLUMNS]
+    y = data[TARGET_COLUMN]
+    return train_test_split(X, y, test_size=0.2, random_state=42)
+
+def serving_stays(size=SERVING_SIZE, seed=42):
+    """Feature frame of random stays drawn like the ones served in production.
+
+    The CSV test split only has 2015-2017 check-ins with at most one
+    weekend and one week night, so it says little about how a tier prices
+    the 2025-26 stays of up to a week the endpoints see. is_Holiday is set
+    for whatever holidays stay_calendar has marked.
+    """
+    rng = np.random.default_rng(seed)
+    check_ins = rng.integers(to_ordinal(SERVING_START), to_ordinal(SERVING_END) + 1, size)
+    nights = rng.integers(1, SERVING_MAX_NIGHTS + 1, size)
+    room_types = rng.integers(0, SERVING_ROOM_TYPES, size)
+    return stay_calendar.feature_frame(check_ins, check_ins + nights, room_types)
+
+def measure_latency(model, X, single_calls=200, batch_size=10000):
+    """Median per-row latency of single-row calls and amortized batched latency, in microseconds"""
+    rows = [X.iloc[[i % len(X)]] for i in range(single_calls)]
+    timings = []
+    for row in rows:
+        started = time.perf_counter()
+        model.predict(row)
+        timings.append(time.perf_counter() - started)
+    batch = X.iloc[np.arange(batch_size) % len(X)]
+    started = time.perf_counter()
+    model.predict(batch)
+    batched = (time.perf_counter() - started) / batch_size
+    return float(np.median(timings)) * 1e6, batched * 1e6
+
+def build_report(X_train, X_test, y_train, y_test, models_dir=MODELS_DIR, distill=True, X_serving=None):
+    """Train every tier and compare it with the full forest.
+
+    With distill=True the tiers learn rf_model's predictions rather than
+    the ADR column, so they reproduce the prices production serves today.
+    X_serving (serving_stays() by default) has no ADR, so tiers are only
+    compared with rf_model on it.
+    """
+    os.makedirs(models_dir, exist_ok=True)
+    if X_serving is None:
+        X_serving = serving_stays()
+    full_model = joblib.load(FULL_MODEL_PATH)
+    full_predictions = full_model.predict(X_test)
+    full_serving_predictions = full_model.predict(X_serving)
+    train_target = full_model.predict(X_train) if distill else y_train
+
+    models = {"full_forest": full_model}
+    for tier, factory in TIERS.items():
+        model = factory().fit(X_train, train_target)
+        joblib.dump(model, tier_path(tier, models_dir))
+        models[tier] = model
+
+    report = []
+    for name, model in models.items():
+        predictions = full_predictions if model is full_model else model.predict(X_test)
+        serving_predictions = full_serving_predictions if model is full_model else model.predict(X_serving)
+        per_row_us, batched_us = measure_latency(model, X_test)
+        report.append({
+            "tier": name,
+            "mae_vs_target": mean_absolute_error(y_test, predictions),
+            "mae_vs_rf_model": mean_absolute_error(full_predictions, predictions),
+            "serving_mae_vs_rf_model": mean_absolute_error(full_serving_predictions, serving_predictions),
+            "serving_max_error_vs_rf_model": max_error(full_serving_predictions, serving_predictions),
+            "per_row_us": per_row_us,
+            "batched_us_per_row": batched_us,
+            "size_kb": len(pickle.dumps(model)) / 1024,
+        })
+    return pd.DataFrame(report)
+
+def main():
+    parser = argparse.ArgumentParser(description="Train and compare smaller pricing model tiers")
+    parser.add_argument("--data", default=DEFAULT_DATA_PATH, help="Training CSV with model features and adr")
+    parser.add_argument("--out", default=MODELS_DIR, help="Directory for the trained tiers")
+    parser.add_argument("--target", choices=["rf_model", "adr"], default="rf_model",
+                        help="Fit the tiers to rf_model's predictions (distillation) or to the adr column")
+    parser.add_argument("--serving-size", type=int, default=SERVING_SIZE,
+                        help="Number of random 2025-26 stays of 1-7 nights to compare the tiers with rf_model on")
+    args = parser.parse_args()
+
+    report = build_report(
+        *load_training_data(args.data), models_dir=args.out, distill=args.target == "rf_model",
+        X_serving=serving_stays(args.serving_size)
+    )
+    print(report.to_string(index=False, float_format=lambda value: f"{value:,.2f}"))
+
+if __name__ == "__main__":
+    # Run through the importable module so pickled tiers reference
+    # model_tiers.PriceTable rather than __main__.PriceTable
+    import model_tiers
+    model_tiers.main()
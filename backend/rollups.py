@@ -0,0 +1,130 @@
+import os
+from datetime import date, datetime, timedelta, timezone
+from bson import ObjectId
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+# Daily revenue/occupancy rollups, one document per (location, room_id, date):
+#   {"location", "room_id", "date", "nights_sold", "revenue", "booking_ids"}
+# revenue is total_price (already net of any corporate discount) spread
+# evenly over the nights of the stay. booking_ids lists the bookings counted
+# in the document, so adding the same booking twice is a no-op.
+ROLLUP_COLLECTION = "daily_rollups"
+
+DAY_MS = 24 * 60 * 60 * 1000
+DUPLICATE_KEY_ERROR = 11000
+
+# Bookings this much older than a rebuild's start are re-applied after it,
+# covering clock skew between app servers generating ObjectIds
+REBUILD_CATCHUP_SECONDS = int(os.getenv("REBUILD_CATCHUP_SECONDS", "60"))
+
+async def create_rollup_indexes(db):
+    await db[ROLLUP_COLLECTION].create_index([("location", 1), ("room_id", 1), ("date", 1)], unique=True)
+    await db[ROLLUP_COLLECTION].create_index([("date", 1)])
+
+def booking_night_updates(booking):
+    """Per-night rollup increments for a single booking.
+
+    Each update only matches a document that has not counted the booking
+    yet. If it already has, the upsert collides with the unique index
+    instead, which record_booking treats as done.
+    """
+    check_in = date.fromisoformat(booking["check_in"])
+    nights = (date.fromisoformat(booking["check_out"]) - check_in).days
+    if nights <= 0:
+        return []
+    rooms = booking.get("number_of_rooms", 1)
+    revenue_per_night = booking["total_price"] / nights
+    return [
+        UpdateOne(
+            {
+                "location": booking.get("location"),
+                "room_id": booking["room_id"],
+                "date": (check_in + timedelta(days=night)).isoformat(),
+                "booking_ids": {"$ne": booking["_id"]}
+            },
+            {"$inc": {"nights_sold": rooms, "revenue": revenue_per_night}, "$push": {"booking_ids": booking["_id"]}},
+            upsert=True
+        )
+        for night in range(nights)
+    ]
+
+async def record_booking(db, booking):
+    """Incrementally add a booking to the daily rollups; safe to repeat"""
+    updates = booking_night_updates(booking)
+    if updates:
+        try:
+            await db[ROLLUP_COLLECTION].bulk_write(updates, ordered=False)
+        except BulkWriteError as e:
+            # Duplicate keys are nights that already count this booking
+            if any(error["code"] != DUPLICATE_KEY_ERROR for error in e.details["writeErrors"]):
+                raise
+
+async def rebuild_rollups(db, location=None):
+    """Recompute the rollups from the bookings collection with an aggregation.
+
+    A booking written while the rebuild runs may be missed by the
+    aggregation, or have its incremental update replaced by it. Every
+    booking created since the rebuild started is therefore re-applied
+    afterwards; record_booking skips the ones already counted.
+    """
+    scope = {"location": location} if location else {}
+    started = ObjectId.from_datetime(datetime.now(timezone.utc) - timedelta(seconds=REBUILD_CATCHUP_SECONDS))
+    await db[ROLLUP_COLLECTION].delete_many(scope)
+    pipeline = [
+        {"$match": scope},
+        {"$addFields": {
+            "_start": {"$dateFromString": {"dateString": "$check_in", "format": "%Y-%m-%d"}},
+            "_end": {"$dateFromString": {"dateString": "$check_out", "format": "%Y-%m-%d"}}
+        }},
+        {"$addFields": {"_nights": {"$toInt": {"$divide": [{"$subtract": ["$_end", "$_start"]}, DAY_MS]}}}},
+        {"$match": {"_nights": {"$gt": 0}}},
+        {"$addFields": {"_night": {"$range": [0, "$_nights"]}}},
+        {"$unwind": "$_night"},
+        {"$group": {
+            "_id": {
+                "location": "$location",
+                "room_id": "$room_id",
+                "date": {"$dateToString": {
+                    "format": "%Y-%m-%d",
+                    "date": {"$add": ["$_start", {"$multiply": ["$_night", DAY_MS]}]}
+                }}
+            },
+            "nights_sold": {"$sum": {"$ifNull": ["$number_of_rooms", 1]}},
+            "revenue": {"$sum": {"$divide": ["$total_price", "$_nights"]}},
+            "booking_ids": {"$push": "$_id"}
+        }},
+        {"$project": {
+            "_id": 0,
+            "location": "$_id.location",
+            "room_id": "$_id.room_id",
+            "date": "$_id.date",
+            "nights_sold": 1,
+            "revenue": 1,
+            "booking_ids": 1
+        }},
+        {"$merge": {
+            "into": ROLLUP_COLLECTION,
+            "on": ["location", "room_id", "date"],
+            "whenMatched": "replace",
+            "whenNotMatched": "insert"
+        }}
+    ]
+    await db.bookings.aggregate(pipeline).to_list(length=None)
+    async for booking in db.bookings.find({**scope, "_id": {"$gte": started}}):
+        await record_booking(db, booking)
+    return await db[ROLLUP_COLLECTION].count_documents(scope)
+
+async def query_rollups(db, start, end, location=None, room_id=None):
+    """Daily time series between start and end (inclusive) from the rollups"""
+    query = {"date": {"$gte": start, "$lte": end}}
+    if location:
+        query["location"] = location
+    if room_id is not None:
+        query["room_id"] = room_id
+    rows = await db[ROLLUP_COLLECTION].find(query, {"_id": 0, "booking_ids": 0}).sort(
+        [("date", 1), ("location", 1), ("room_id", 1)]
+    ).to_list(length=None)
+    for row in rows:
+        row["average_rate"] = row["revenue"] / row["nights_sold"] if row["nights_sold"] else 0
+    return rows
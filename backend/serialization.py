@@ -0,0 +1,70 @@
+from typing import Optional
+import msgspec
+from bson import ObjectId
+from fastapi import Response
+
+# Compact typed response structs. Fields left at their defaults are omitted
+# so the JSON keeps the same shape as the old untyped dicts.
+
+class PriceFactors(msgspec.Struct, omit_defaults=True):
+    model: str
+    year: Optional[int] = None
+    month: Optional[int] = None
+    weekend_nights: Optional[int] = None
+    week_nights: Optional[int] = None
+    room_type: Optional[int] = None
+    is_holiday: Optional[bool] = None
+    holiday: Optional[float] = None
+    weekend: Optional[float] = None
+    low_occupancy: Optional[float] = None
+    high_occupancy: Optional[float] = None
+    error: Optional[str] = None
+
+class RoomPrice(msgspec.Struct):
+    room_id: int
+    location: Optional[str]
+    price: float
+    base_price: float
+    price_factors: PriceFactors
+
+class StayOption(msgspec.Struct):
+    room_id: int
+    type: Optional[str]
+    location: Optional[str]
+    check_in: str
+    check_out: str
+    nights: int
+    price_per_night: float
+    total_price: float
+    rooms_left: int
+    model: str
+
+class RoomStats(msgspec.Struct):
+    totalRooms: int
+    occupiedRooms: int
+    occupancyRate: int
+
+class BookingCreated(msgspec.Struct):
+    message: str
+    booking_id: str
+
+def _encode_extra(obj):
+    """Encode types msgspec does not know about, such as Mongo ObjectIds"""
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    raise NotImplementedError(f"Cannot serialize {type(obj).__name__}")
+
+# Mongo documents are encoded directly; ObjectIds are converted while
+# encoding rather than in a separate pass over the documents
+_encoder = msgspec.json.Encoder(enc_hook=_encode_extra)
+
+def encode_json(payload):
+    """Encode structs, dicts and Mongo documents to JSON bytes"""
+    return _encoder.encode(payload)
+
+class FastJSONResponse(Response):
+    """JSON response rendered with the msgspec encoder"""
+    media_type = "application/json"
+
+    def render(self, content):
+        return encode_json(content)
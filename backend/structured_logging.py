@@ -0,0 +1,170 @@
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+# Logging settings
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+# Level for third-party libraries (pymongo, asyncio, ...) logging through the root logger
+LOG_ROOT_LEVEL = os.getenv("LOG_ROOT_LEVEL", "INFO").upper()
+# Per-logger overrides, e.g. "hotel.holidays=DEBUG,uvicorn.access=WARNING"
+LOG_LEVELS = os.getenv("LOG_LEVELS", "")
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+# Debug records are sampled and then capped per message per interval
+LOG_DEBUG_SAMPLE_RATE = float(os.getenv("LOG_DEBUG_SAMPLE_RATE", "1.0"))
+LOG_DEBUG_MAX_PER_INTERVAL = int(os.getenv("LOG_DEBUG_MAX_PER_INTERVAL", "10"))
+LOG_DEBUG_INTERVAL_SECONDS = float(os.getenv("LOG_DEBUG_INTERVAL_SECONDS", "10"))
+
+LOGGER_PREFIX = "hotel"
+
+# Uvicorn installs its own console handlers; route them through the queue too
+UVICORN_LOGGERS = ("uvicorn", "uvicorn.error", "uvicorn.access")
+
+# Attributes every LogRecord has; anything else was passed through extra=
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "taskName", "color_message"}
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line with the message, extra fields and any traceback"""
+
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+class HotPathFilter(logging.Filter):
+    """Sample debug records and cap each message template to a few per interval.
+
+    Records above DEBUG always pass. The first record let through after a
+    quiet spell carries the number of records suppressed in between.
+    """
+
+    def __init__(self, sample_rate=LOG_DEBUG_SAMPLE_RATE, max_per_interval=LOG_DEBUG_MAX_PER_INTERVAL,
+                 interval_seconds=LOG_DEBUG_INTERVAL_SECONDS):
+        super().__init__()
+        self.sample_rate = sample_rate
+        self.max_per_interval = max_per_interval
+        self.interval_seconds = interval_seconds
+        self.windows = {}
+        self.suppressed = 0
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno > logging.DEBUG:
+            return True
+        if self.sample_rate < 1 and random.random() >= self.sample_rate:
+            self.suppressed += 1
+            return False
+        key = (record.name, record.msg)
+        now = time.monotonic()
+        with self._lock:
+            window = self.windows.get(key)
+            if window is None or now - window[0] >= self.interval_seconds:
+                # [window start, records emitted, records suppressed]
+                window = self.windows[key] = [now, 0, window[2] if window else 0]
+            if window[1] >= self.max_per_interval:
+                window[2] += 1
+                self.suppressed += 1
+                return False
+            window[1] += 1
+            if window[2]:
+                record.suppressed = window[2]
+                window[2] = 0
+        return True
+
+class DroppingQueueHandler(QueueHandler):
+    """Queue handler that drops records instead of blocking when the queue is full"""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Merge the arguments and render any traceback now, while they are
+        # current, but leave the JSON formatting to the listener thread
+        record = logging.makeLogRecord(vars(record))
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+class LoggingSystem:
+    """Root logger wiring: callers enqueue records, a listener thread formats and writes them"""
+
+    def __init__(self):
+        self.queue_handler = None
+        self.hot_path_filter = None
+        self.listener = None
+
+    def configure(self):
+        """Install the queue handler and start the listener; safe to call twice"""
+        if self.listener is not None:
+            return
+        log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+        self.queue_handler = DroppingQueueHandler(log_queue)
+        self.hot_path_filter = HotPathFilter()
+        self.queue_handler.addFilter(self.hot_path_filter)
+
+        stream_handler = logging.StreamHandler(sys.stdout)
+        stream_handler.setFormatter(JsonFormatter())
+        self.listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+
+        root = logging.getLogger()
+        root.handlers = [self.queue_handler]
+        root.setLevel(LOG_ROOT_LEVEL)
+        logging.getLogger(LOGGER_PREFIX).setLevel(LOG_LEVEL)
+        for name in UVICORN_LOGGERS:
+            uvicorn_logger = logging.getLogger(name)
+            uvicorn_logger.handlers = []
+            uvicorn_logger.propagate = True
+        for override in LOG_LEVELS.split(","):
+            name, _, level = override.partition("=")
+            if name.strip() and level.strip():
+                logging.getLogger(name.strip()).setLevel(level.strip().upper())
+
+        self.listener.start()
+        atexit.register(self.stop)
+
+    def stop(self):
+        """Flush queued records and stop the listener thread"""
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+
+    def metrics(self):
+        return {
+            "queued": self.queue_handler.queue.qsize() if self.queue_handler else 0,
+            "dropped": self.queue_handler.dropped if self.queue_handler else 0,
+            "debug_suppressed": self.hot_path_filter.suppressed if self.hot_path_filter else 0,
+        }
+
+logging_system = LoggingSystem()
+
+def get_logger(name):
+    """Logger under the application's namespace, e.g. get_logger("holidays") -> hotel.holidays"""
+    return logging.getLogger(f"{LOGGER_PREFIX}.{name}")
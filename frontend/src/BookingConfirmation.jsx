@@ -59,7 +59,8 @@ const BookingConfirmation = () => {
         const response = await axios.get('https://dynamic-pricing-engine-bknd.onrender.com/api/dynamic-pricing', {
           params: {
             check_in: initialFormData.checkIn,
-            check_out: initialFormData.checkOut
+            check_out: initialFormData.checkOut,
+            location: initialRoom.location
           }
         });
         
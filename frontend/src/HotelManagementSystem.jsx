@@ -73,10 +73,13 @@ const HotelManagementSystem = () => {
         axios.get('https://dynamic-pricing-engine-bknd.onrender.com/api/dynamic-pricing', {
           params: { 
             check_in: checkIn, 
-            check_out: checkOut 
+            check_out: checkOut,
+            location: location
           }
         }),
-        axios.get('https://dynamic-pricing-engine-bknd.onrender.com/api/next-available-dates')
+        axios.get('https://dynamic-pricing-engine-bknd.onrender.com/api/next-available-dates', {
+          params: { location: location }
+        })
       ]);
 
       // Process rooms data
@@ -205,13 +205,10 @@ const Rooms = () => {
 
       const [roomsResponse, pricingResponse, nextDatesResponse] = await Promise.all([
         axios.get('https://dynamic-pricing-engine-bknd.onrender.com/api/rooms', { params }),
-        axios.get('https://dynamic-pricing-engine-bknd.onrender.com/api/dynamic-pricing', {
-          params: { 
-            check_in: checkIn, 
-            check_out: checkOut 
-          }
-        }),
-        axios.get('https://dynamic-pricing-engine-bknd.onrender.com/api/next-available-dates')
+        axios.get('https://dynamic-pricing-engine-bknd.onrender.com/api/dynamic-pricing', { params }),
+        axios.get('https://dynamic-pricing-engine-bknd.onrender.com/api/next-available-dates', {
+          params: params.location ? { location: params.location } : {}
+        })
       ]);
 
       // Process rooms data